@@ -0,0 +1,92 @@
+# python3
+# balance_scoring.py - Scores how balanced many boards are at once with NumPy.
+
+import numpy as np
+
+from board_state import RESOURCES
+from catan_board import SCORED_RESOURCES
+
+
+# The resources that count towards the balance of a board (the same ones the boards count)
+SCORED = np.isin(np.arange(len(RESOURCES)), SCORED_RESOURCES)
+
+
+def board_arrays(boards):
+    """
+    Stacks the resource codes and tile points of the boards into two (boards x tiles) arrays.
+    All the boards must have the same shape.
+    """
+    boards = list(boards)
+    if len(boards) == 0:
+        empty = np.zeros((0, 0), dtype=np.uint8)
+        return empty, empty
+    resources = np.empty((len(boards), boards[0].topology.size), dtype=np.uint8)
+    points = np.empty_like(resources)
+    for i, board in enumerate(boards):
+        resources[i] = np.frombuffer(board.state.resources, dtype=np.uint8)
+        points[i] = np.frombuffer(board.state.points, dtype=np.uint8)
+
+    return resources, points
+
+
+def points_per_resource(resources, points):
+    """
+    Returns a (boards x resource codes) array of how many points each board gives each resource,
+    along with a mask of which scored resources are on each board.
+    """
+    resources = np.asarray(resources)
+    points = np.asarray(points)
+    num_boards = resources.shape[0]
+    num_codes = len(RESOURCES)
+
+    # Give every (board, resource) pair its own bin so one bincount adds up every board
+    bins = resources.astype(np.intp) + (np.arange(num_boards, dtype=np.intp) * num_codes)[:, None]
+    totals = np.bincount(bins.ravel(), weights=points.ravel(), minlength=num_boards * num_codes)
+    counts = np.bincount(bins.ravel(), minlength=num_boards * num_codes)
+    totals = totals.reshape(num_boards, num_codes)
+    present = (counts.reshape(num_boards, num_codes) > 0) & SCORED
+
+    return np.where(present, totals, 0), present
+
+
+def balance_metrics(resources, points):
+    """
+    Scores every board (one per row of resources and points) and returns a dictionary of arrays:
+        points:         points per resource code
+        total_diff:     total difference of each resource's points from the average (what the scripts filter on)
+        mean_deviation: mean absolute deviation of the points per resource
+        spread:         most points minus least points of any resource
+        std:            standard deviation of the points per resource
+    """
+    totals, present = points_per_resource(resources, points)
+    num_present = present.sum(axis=1)
+    divisor = np.maximum(num_present, 1)
+    average = totals.sum(axis=1) / divisor
+
+    deviation = np.where(present, np.abs(totals - average[:, None]), 0)
+    total_diff = deviation.sum(axis=1)
+    squared = np.where(present, (totals - average[:, None]) ** 2, 0)
+    highest = np.where(present, totals, -np.inf).max(axis=1, initial=-np.inf)
+    lowest = np.where(present, totals, np.inf).min(axis=1, initial=np.inf)
+
+    return {
+        'points': totals,
+        'total_diff': total_diff,
+        'mean_deviation': total_diff / divisor,
+        'spread': np.where(num_present > 0, highest - lowest, 0),
+        'std': np.sqrt(squared.sum(axis=1) / divisor),
+    }
+
+
+def score_boards(boards):
+    """
+    Returns the balance metrics for a list of boards.
+    """
+    return balance_metrics(*board_arrays(boards))
+
+
+def filter_balanced(resources, points, threshold, metric='total_diff'):
+    """
+    Returns the indices of the boards that score under the threshold.
+    """
+    return np.flatnonzero(balance_metrics(resources, points)[metric] < threshold)
@@ -0,0 +1,155 @@
+# python3
+# batch_generation.py - Generates boards in batches across a pool of worker processes.
+
+import heapq
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from os import cpu_count
+
+from board_errors import BoardGenerationError
+from board_stats import BoardStats
+
+
+class BoardSpec:
+    """
+    Everything needed to build one board: the island class (CatanIsland or SeafarerIslands)
+    and the arguments it is created with.
+    A spec is sent to the worker processes, so the class and arguments must be picklable.
+    """
+
+    def __init__(self, board_class, *args, **kwargs):
+        self.board_class = board_class
+        self.args = args
+        self.kwargs = kwargs
+
+    def build(self, seed=None, stats=None):
+        """
+        Builds a board from the seed, so the same seed always gives the same board.
+        """
+        return self.board_class(*self.args, rng=seed, stats=stats, **self.kwargs)
+
+
+def _seed_stream(seed=None):
+    """
+    Yields an independent seed for every board.
+    The seeds (and so the boards) are reproducible if a seed is given.
+    """
+    rng = random.Random(seed)
+    while True:
+        yield rng.getrandbits(64)
+
+
+def _generate_chunk(spec, seeds, threshold=None, keep=None, record_stats=False):
+    """
+    Builds a board for every seed and returns (total_diff, seed, board) for each board
+    under the threshold. Only the best keep boards are returned if keep is given,
+    so the boards that would be thrown away are never sent back from the worker.
+    Also returns the stats of the chunk (as a dictionary) if record_stats is True.
+    """
+    stats = BoardStats() if record_stats else None
+    results = []
+    for seed in seeds:
+        try:
+            board = spec.build(seed, stats)
+        except BoardGenerationError:
+            # Skip the rare boards that could not be generated within the budget
+            if stats is not None:
+                stats.count('failed_boards')
+            continue
+        total_diff = board.total_diff
+        if threshold is None or total_diff < threshold:
+            results.append((total_diff, seed, board))
+
+    if keep is not None:
+        results = heapq.nsmallest(keep, results, key=_result_key)
+    return results, None if stats is None else stats.to_dict()
+
+
+def _result_key(result):
+    total_diff, seed, board = result
+    return total_diff, seed
+
+
+def generate_boards(spec, count=None, threshold=None, processes=None, seed=None, chunk_size=32, keep=None, stats=None):
+    """
+    Yields (total_diff, seed, board) for the boards built from the spec,
+    in the order the worker processes finish them.
+
+    count is how many boards to build (forever if None) and only boards with a
+    total_diff under the threshold are yielded. Every board gets its own seed,
+    so any board can be built again with spec.build(seed).
+    Boards are built in chunks of chunk_size per task, and only a couple of chunks
+    per process are queued at a time so stopping early doesn't leave work behind.
+    With processes=1 everything is built in this process.
+    If a BoardStats is given, the stats from every worker are added into it as the chunks finish.
+    """
+    if processes is None:
+        processes = cpu_count() or 1
+    seeds = _seed_stream(seed)
+
+    def chunks():
+        remaining = count
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            if remaining is not None:
+                remaining -= size
+            yield [next(seeds) for i in range(size)]
+
+    def finish(chunk_results):
+        results, chunk_stats = chunk_results
+        if chunk_stats is not None:
+            stats.merge(chunk_stats)
+        return results
+
+    record_stats = stats is not None
+    if processes == 1:
+        for chunk in chunks():
+            yield from finish(_generate_chunk(spec, chunk, threshold, keep, record_stats))
+        return
+
+    executor = ProcessPoolExecutor(processes)
+    try:
+        tasks = chunks()
+        pending = set()
+        for chunk in tasks:
+            pending.add(executor.submit(_generate_chunk, spec, chunk, threshold, keep, record_stats))
+            if len(pending) >= processes * 2:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = next(tasks, None)
+                if chunk is not None:
+                    pending.add(executor.submit(_generate_chunk, spec, chunk, threshold, keep, record_stats))
+                yield from finish(future.result())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def first_boards(spec, k, threshold, count=None, **kwargs):
+    """
+    Returns the first k boards with a total_diff under the threshold (as (total_diff, seed, board)),
+    stopping the generation as soon as there are enough.
+    Gives up after count boards if a count is given, so fewer than k boards may be returned.
+    """
+    results = []
+    if k <= 0:
+        return results
+    boards = generate_boards(spec, count, threshold, **kwargs)
+    try:
+        for result in boards:
+            results.append(result)
+            if len(results) == k:
+                break
+    finally:
+        boards.close()
+
+    return results
+
+
+def best_boards(spec, n, k, threshold=None, **kwargs):
+    """
+    Builds n boards and returns the k most balanced ones (as (total_diff, seed, board)),
+    most balanced first.
+    """
+    return heapq.nsmallest(k, generate_boards(spec, n, threshold, keep=k, **kwargs), key=_result_key)
@@ -0,0 +1,168 @@
+# python3
+# benchmarks.py - Times board generation for every map preset and compares it against a saved baseline.
+
+import argparse
+import json
+import os
+import tracemalloc
+from time import perf_counter
+
+from board_errors import BoardGenerationError
+from board_presets import load_presets
+from board_stats import BoardStats
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# The boards built by each of the map presets (see presets.json)
+PRESETS = {name: preset.spec for name, preset in load_presets().items()}
+
+
+def _percentile(ordered, percent):
+    """
+    Nearest rank percentile of an already sorted list.
+    """
+    if len(ordered) == 0:
+        return 0
+    rank = max(1, round(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def benchmark(spec, boards=200, seed=0, memory_boards=20):
+    """
+    Builds boards from the spec one after the other and returns the timings:
+        boards_per_sec:    boards built per second (including the failed builds)
+        p50_ms, p95_ms, p99_ms: latency of a single build
+        failures:          builds that raised a BoardGenerationError (counted, not built again)
+        peak_memory_kb:    the most memory allocated while building a board
+        counters:          the BoardStats counters (resets and restarts inside the builds)
+        timings:           seconds spent in each phase of the builds
+    Every run uses the same seeds so the numbers are comparable between runs.
+    Memory is measured separately on a few boards since tracing slows the builds down,
+    and the counters are taken in a run of their own so the timed run is built without stats.
+    """
+    latencies = []
+    failures = 0
+    start = perf_counter()
+    for i in range(boards):
+        board_start = perf_counter()
+        try:
+            spec.build(seed + i)
+        except BoardGenerationError:
+            failures += 1
+        latencies.append(perf_counter() - board_start)
+    elapsed = perf_counter() - start
+
+    stats = BoardStats()
+    for i in range(boards):
+        try:
+            spec.build(seed + i, stats)
+        except BoardGenerationError:
+            pass
+
+    tracemalloc.start()
+    peak = 0
+    for i in range(memory_boards):
+        tracemalloc.reset_peak()
+        try:
+            spec.build(seed + i)
+        except BoardGenerationError:
+            pass
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'boards': boards,
+        'boards_per_sec': boards / elapsed if elapsed > 0 else 0,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p95_ms': _percentile(latencies, 95) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'failures': failures,
+        'peak_memory_kb': peak / 1024,
+        'counters': stats.counters,
+        'timings': stats.timings,
+    }
+
+
+def run_benchmarks(presets=None, boards=200, seed=0):
+    """
+    Benchmarks the given presets (all of them by default) and returns {preset: results}.
+    """
+    if presets is None:
+        presets = list(PRESETS)
+
+    return {name: benchmark(PRESETS[name], boards, seed) for name in presets}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns a list of regressions, where a preset got more than tolerance
+    slower (or used more than tolerance more memory) than in the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'peak_memory_kb'):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {base[metric]:.2f} -> {result[metric]:.2f}")
+        if result['boards_per_sec'] < base['boards_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: boards_per_sec {base['boards_per_sec']:.1f} -> {result['boards_per_sec']:.1f}")
+
+    return regressions
+
+
+def print_results(results):
+    """
+    Prints a row of timings for each preset, followed by the retry, reset and restart counters of its builds.
+    """
+    print(f"{'preset':50} {'boards/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failures':>8} {'peak KB':>8}")
+    for name, result in results.items():
+        print(
+            f"{name:50} {result['boards_per_sec']:9.1f} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} "
+            f"{result['p99_ms']:8.2f} {result['failures']:8} {result['peak_memory_kb']:8.1f}"
+        )
+        counters = result.get('counters', {})
+        if len(counters) > 0:
+            print("    " + ", ".join(f"{counter} {count}" for counter, count in sorted(counters.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark board generation for every map preset.")
+    parser.add_argument('presets', nargs='*', help="presets to run (all of them by default)")
+    parser.add_argument('--boards', type=int, default=200, help="boards to build per preset")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline file to compare against")
+    parser.add_argument('--save', action='store_true', help="save the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="how much slower counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.presets or None, args.boards, args.seed)
+    print_results(results)
+
+    if args.save:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=4)
+        print(f"\nSaved the baseline to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    except FileNotFoundError:
+        print(f"\nNo baseline at {args.baseline} (run with --save to create one)")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if len(regressions) > 0:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        raise SystemExit(1)
+    print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# python3
+# board_enumeration.py - Lists every valid board for a small island, the most balanced boards first.
+
+from array import array
+
+from board_state import RESOURCES, NUMBER_POINTS, EMPTY, DESERT, SEA, GOLD, NO_NUMBER, resource_code, number_code, number_name
+from catan_board import CatanIsland, balance_score
+from cluster_index import ClusterIndex
+from hex_topology import get_topology
+
+
+def _transform(values, symmetry):
+    """
+    Moves every tile's value to the tile the symmetry maps it onto.
+    """
+    transformed = [None] * len(values)
+    for tile, value in enumerate(values):
+        transformed[symmetry[tile]] = value
+
+    return tuple(transformed)
+
+
+def _sub_multisets(items, size):
+    """
+    Yields every way of choosing size items out of a multiset,
+    given as a list of (item, quantity) pairs.
+    """
+    if size == 0:
+        yield ()
+        return
+    if len(items) == 0:
+        return
+    (item, quantity), rest = items[0], items[1:]
+    for take in range(min(quantity, size), -1, -1):
+        for chosen in _sub_multisets(rest, size - take):
+            yield ((item, take),) + chosen if take > 0 else chosen
+
+
+def _number_partitions(numbers, group_sizes):
+    """
+    Yields every way of handing out the numbers (number -> quantity)
+    to the resources (a list of (resource, number of tiles)),
+    as a dictionary of resource -> the numbers it gets.
+    """
+    if len(group_sizes) == 0:
+        yield {}
+        return
+    (resource, size), rest = group_sizes[0], group_sizes[1:]
+    items = sorted((number, quantity) for number, quantity in numbers.items() if quantity > 0)
+    for chosen in _sub_multisets(items, size):
+        remaining = dict(numbers)
+        for number, quantity in chosen:
+            remaining[number] -= quantity
+        for partition in _number_partitions(remaining, rest):
+            partition[resource] = tuple(number for number, quantity in chosen for i in range(quantity))
+            yield partition
+
+
+def _resource_layouts(topology, tile_resources, counts, adj_resource_limit):
+    """
+    Yields every way of placing the resources on the empty tiles
+    that keeps each cluster of the same resource within the limit.
+    """
+    clusters = ClusterIndex(topology, tile_resources)
+    empty_tiles = [tile for tile in range(topology.size) if tile_resources[tile] == EMPTY]
+    remaining = dict(counts)
+
+    def place(k):
+        if k == len(empty_tiles):
+            yield tuple(tile_resources)
+            return
+        tile = empty_tiles[k]
+        for resource in sorted(remaining):
+            if remaining[resource] > 0 and clusters.merged_size(tile, resource) <= adj_resource_limit:
+                clusters.assign(tile, resource)
+                remaining[resource] -= 1
+                yield from place(k + 1)
+                remaining[resource] += 1
+                clusters.clear(tile)
+
+    yield from place(0)
+
+
+def _number_layouts(board, land_tiles, partition, checks_by_tile):
+    """
+    Places the numbers each resource was given on the tiles of that resource,
+    yielding every time all the land tiles have a number that passes the checks.
+    """
+    state = board.state
+    remaining = {}
+    for resource, numbers in partition.items():
+        remaining[resource] = {}
+        for number in numbers:
+            remaining[resource][number] = remaining[resource].get(number, 0) + 1
+
+    def place(k):
+        if k == len(land_tiles):
+            yield
+            return
+        tile = land_tiles[k]
+        numbers = remaining[state.resources[tile]]
+        for number in sorted(numbers):
+            if numbers[number] > 0 and board._check_adjacent_tiles(tile, number):
+                if board._try_number(tile, number, checks_by_tile):
+                    numbers[number] -= 1
+                    yield from place(k + 1)
+                    numbers[number] += 1
+                    state.set_number(tile, NO_NUMBER)
+
+    yield from place(0)
+
+
+def enumerate_boards(max_width, min_width, resource_dict, numbers_dict, desert_center=True, adj_resource_limit=2):
+    """
+    Yields (total_diff, board) for every valid board with the given inputs,
+    following the same rules as CatanIsland, in order of how balanced the boards are.
+
+    Boards that are the same under a rotation or reflection of the island are only yielded once.
+    The boards are generated lazily so the best boards come out first;
+    this is only practical for small islands (such as 3, 2 islands),
+    since the number of boards grows very quickly with the size of the island.
+
+    The balance of a board only depends on which numbers go to which resource,
+    so every way of handing out the numbers is scored first,
+    and then placed on every resource layout in order of that score.
+    """
+    topology = get_topology(max_width, min_width)
+    counts = {resource_code(resource): quantity for resource, quantity in resource_dict.items() if quantity > 0}
+    numbers = {number_code(number): quantity for number, quantity in numbers_dict.items() if quantity > 0}
+    if sum(counts.values()) != topology.size:
+        raise ValueError(f"A {max_width}, {min_width} island has {topology.size} tiles, but there are {sum(counts.values())} resources")
+
+    # Place desert in the center of the island unless otherwise specified
+    tile_resources = array('B', bytes(topology.size))
+    if desert_center == True:
+        for tile in topology.center_order[:counts.get(DESERT, 0)]:
+            tile_resources[tile] = DESERT
+            counts[DESERT] -= 1
+
+    land = {resource: quantity for resource, quantity in counts.items() if resource > SEA}
+    if sum(land.values()) != sum(numbers.values()):
+        raise ValueError(f"There are {sum(land.values())} land tiles, but {sum(numbers.values())} numbers")
+
+    # Only the symmetries that keep the deserts where they were placed
+    fixed = tuple(tile_resources)
+    symmetries = [symmetry for symmetry in topology.symmetries if _transform(fixed, symmetry) == fixed]
+
+    # Keep one resource layout out of each set of symmetric layouts,
+    # along with the symmetries that map the layout onto itself
+    layouts = []
+    for layout in _resource_layouts(topology, tile_resources, counts, adj_resource_limit):
+        transformed = [(_transform(layout, symmetry), symmetry) for symmetry in symmetries]
+        if all(other >= layout for other, symmetry in transformed):
+            stabilizer = [symmetry for other, symmetry in transformed if other == layout]
+            board = CatanIsland(max_width, min_width, {}, {})
+            board.state.resources[:] = array('B', layout)
+            board.state.count_resources()
+            land_tiles = [tile for tile in range(topology.size) if layout[tile] > SEA]
+            checks, checks_by_tile = board._three_tile_checks(land_tiles)
+            layouts.append((board, land_tiles, checks_by_tile, stabilizer))
+
+    # Score every way of handing out the numbers to the resources
+    partitions = []
+    for partition in _number_partitions(numbers, sorted(land.items())):
+        points_per_resource = {
+            resource: sum(NUMBER_POINTS[number] for number in partition_numbers)
+            for resource, partition_numbers in partition.items() if resource != GOLD
+        }
+        key = tuple(sorted(partition.items()))
+        partitions.append((balance_score(points_per_resource), key, partition))
+    partitions.sort()
+
+    for total_diff, key, partition in partitions:
+        for board, land_tiles, checks_by_tile, stabilizer in layouts:
+            for placed in _number_layouts(board, land_tiles, partition, checks_by_tile):
+                tile_numbers = tuple(board.state.numbers)
+                # Symmetric layouts can still give the same board with the numbers moved around
+                if all(_transform(tile_numbers, symmetry) >= tile_numbers for symmetry in stabilizer):
+                    yield total_diff, CatanIsland.from_layout(
+                        max_width, min_width,
+                        [RESOURCES[resource] for resource in board.state.resources],
+                        [number_name(number) for number in tile_numbers],
+                    )
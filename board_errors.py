@@ -0,0 +1,19 @@
+# python3
+# board_errors.py - Errors raised while generating Catan boards.
+
+
+class BoardGenerationError(RuntimeError):
+    """
+    Raised when a board could not be generated within the allowed budget.
+    """
+
+
+class InfeasibleConfigError(ValueError):
+    """
+    Raised before any generation when a board config can never be generated,
+    with the list of problems found in it.
+    """
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("Board config can't be generated:\n" + '\n'.join(f"  - {problem}" for problem in self.problems))
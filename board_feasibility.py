@@ -0,0 +1,228 @@
+# python3
+# board_feasibility.py - Checks made on a board config before anything is generated, so a config
+# that can never be generated fails straight away with what is wrong instead of retrying until its budget runs out.
+
+from board_errors import InfeasibleConfigError
+from board_state import RESOURCES, DESERT, SEA, NUMBER_POINTS, number_code, resource_code
+from hex_topology import get_topology
+
+
+# The configs that passed so far, so the boards built from one config only check it once
+_feasible = set()
+
+
+def independence_bound(topology, tiles):
+    """
+    Returns an upper bound on how many of the given tiles can be picked with no two of them next to each other.
+
+    The tiles are covered with groups of tiles that are all next to each other: the three tiles around
+    an intersection first, then pairs of neighbors, then single tiles. Only one tile of a group can be picked,
+    so there can't be more picks than groups. On a whole island the bound is exact.
+    """
+    tiles = set(tiles)
+    graph = topology.graph
+    covered = set()
+    groups = 0
+    for vertex in graph.intersections:
+        members = graph.vertex_tiles[vertex]
+        if all(tile in tiles and tile not in covered for tile in members):
+            covered.update(members)
+            groups += 1
+
+    for tile in sorted(tiles):
+        if tile in covered:
+            continue
+        covered.add(tile)
+        for adj in topology.adjacents[tile]:
+            if adj in tiles and adj not in covered:
+                covered.add(adj)
+                break
+        groups += 1
+
+    return groups
+
+
+def _resource_codes(resources):
+    return {resource_code(resource): quantity for resource, quantity in resources.items() if quantity > 0}
+
+
+def _number_codes(numbers):
+    return {number_code(number): quantity for number, quantity in numbers.items() if quantity > 0}
+
+
+def _cluster_problems(topology, tiles, resources, placed, adj_resource_limit, field):
+    """
+    The resources that can't be kept within adj_resource_limit on the tiles, when placed tiles get one of them.
+    The groups of connected tiles of a resource can't touch each other, so there can't be more groups
+    than tiles that are apart, and each group holds at most adj_resource_limit tiles.
+    """
+    spare = max(sum(resources.values()) - placed, 0)
+    bound = None
+    problems = []
+    for resource, quantity in sorted(resources.items()):
+        # With more resources than tiles only what can't be left over has to fit
+        needed = quantity - spare
+        if needed <= 0:
+            continue
+        if adj_resource_limit < 1:
+            return [f"{field}adj_resource_limit must be at least 1, not {adj_resource_limit}"]
+        groups = -(-needed // adj_resource_limit)
+        if bound is None:
+            bound = independence_bound(topology, tiles)
+        if groups > bound:
+            problems.append(
+                f"{field}{needed} {RESOURCES[resource]} tiles need {groups} groups of at most {adj_resource_limit} "
+                f"apart from each other, but at most {bound} fit"
+            )
+
+    return problems
+
+
+def _number_problems(topology, tiles, numbers, placed, field):
+    """
+    The numbers that can't be kept apart on the tiles, when placed tiles get a number:
+    the same number can't be next to itself, and neither can two 5 point (6 and 8) or two 1 point (2 and 12) numbers.
+    """
+    spare = max(sum(numbers.values()) - placed, 0)
+    bound = None
+    problems = []
+    groups = [({number}, f"{number}s") for number in sorted(numbers) if NUMBER_POINTS[number] not in (5, 1)]
+    groups += [
+        ({number for number in numbers if NUMBER_POINTS[number] == points}, names)
+        for points, names in ((5, '6s and 8s'), (1, '2s and 12s'))
+    ]
+    for group, names in groups:
+        needed = sum(numbers[number] for number in group) - spare
+        if needed <= 1:
+            continue
+        if bound is None:
+            bound = independence_bound(topology, tiles)
+        if needed > bound:
+            problems.append(f"{field}{needed} {names} can't all be kept apart, at most {bound} fit")
+
+    return problems
+
+
+def island_problems(topology, resources, numbers, desert_center=True, adj_resource_limit=2, field=''):
+    """
+    Returns what keeps an island (see CatanIsland) from ever being generated, or an empty list if nothing does.
+    Only what no amount of retrying gets around is reported: fewer resources than tiles,
+    resources that can't be kept within adj_resource_limit and numbers that can't be kept apart.
+    """
+    resources = _resource_codes(resources)
+    numbers = _number_codes(numbers)
+    tiles = list(range(topology.size))
+    problems = []
+
+    if resources:
+        if sum(resources.values()) < len(tiles):
+            problems.append(f"{field}{sum(resources.values())} resources for {len(tiles)} tiles")
+        # The deserts in the center are placed before the solver, so they don't count towards the limit
+        if desert_center and DESERT in resources:
+            deserts = set(topology.center_order[:resources.pop(DESERT)])
+            tiles = [tile for tile in tiles if tile not in deserts]
+        problems += _cluster_problems(topology, tiles, resources, len(tiles), adj_resource_limit, field)
+
+    if numbers:
+        # At least this many tiles take a number: all of them but the deserts and sea
+        dead = sum(quantity for resource, quantity in resources.items() if resource in (DESERT, SEA))
+        problems += _number_problems(topology, tiles, numbers, len(tiles) - dead, field)
+
+    return problems
+
+
+def seafarers_problems(max_width, min_width, resources, main_island_resources, main_island_numbers, small_islands_numbers,
+        adj_resource_limit=2, main_island_center=False, main_island_dimensions=(5, 3), main_island_desert_center=True,
+        num_islands=4):
+    """
+    Returns what keeps a SeafarerIslands board from ever being generated, or an empty list if nothing does:
+    the main island's own problems (with its limit of one resource of a kind together),
+    a main island that doesn't fit on the map, and small islands that can't be split off or filled.
+    """
+    topology = get_topology(max_width, min_width)
+    main_topology = get_topology(*main_island_dimensions)
+    problems = []
+
+    if resources and sum(resources.values()) < topology.size:
+        problems.append(f"{sum(resources.values())} resources for the {topology.size} tiles of the map")
+    problems += island_problems(
+        main_topology, main_island_resources, main_island_numbers, main_island_desert_center, 1, 'main island: ',
+    )
+    if num_islands < 1:
+        problems.append(f"num_islands must be at least 1, not {num_islands}")
+
+    try:
+        offset = topology.center_offset(main_topology) if main_island_center else topology.edge_offset(main_topology)
+        main_tiles = set(topology.embedding(main_topology, offset))
+    except ValueError as error:
+        problems.append(f"main island: {error}")
+        return problems
+    if not resources:
+        return problems
+
+    # What is left for the small islands once the main island, the two sea corners
+    # and (at most) a ring of sea all around the main island are taken out
+    remaining = _resource_codes(resources)
+    for resource, quantity in _resource_codes(main_island_resources).items():
+        if resource in remaining:
+            remaining[resource] = max(remaining[resource] - quantity, 0)
+    corners = {topology.corners[corner] for corner in ('left', 'right')} - main_tiles
+    free = [tile for tile in range(topology.size) if tile not in main_tiles and tile not in corners]
+    ring = {tile for tile in free if any(adj in main_tiles for adj in topology.adjacents[tile])}
+    sea = max(remaining.pop(SEA, 0) - len(corners), 0)
+    remaining.pop(DESERT, None)
+    land = sum(remaining.values())
+    # The fewest and the most tiles the small islands can get
+    fewest = max(min(len(free) - len(ring) - max(sea - len(ring), 0), land), 0)
+    most = min(len(free), land)
+
+    if most > 0:
+        if num_islands > most:
+            problems.append(f"only {most} small island tiles for {num_islands} islands")
+        else:
+            apart = independence_bound(topology, free)
+            if num_islands > apart:
+                problems.append(f"{num_islands} small islands can't be kept apart, at most {apart} fit")
+        problems += _cluster_problems(topology, free, remaining, fewest, adj_resource_limit, 'small islands: ')
+        problems += _number_problems(topology, free, _number_codes(small_islands_numbers), fewest, 'small islands: ')
+
+    return problems
+
+
+def _frozen(value):
+    if isinstance(value, dict):
+        return tuple(sorted(value.items()))
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _key(*args, **kwargs):
+    return tuple(_frozen(value) for value in args) + tuple((name, _frozen(value)) for name, value in sorted(kwargs.items()))
+
+
+def check_island(max_width, min_width, resources, numbers, desert_center=True, adj_resource_limit=2):
+    """
+    Raises an InfeasibleConfigError with every problem found if the island can never be generated.
+    """
+    key = _key('catan', max_width, min_width, resources, numbers, desert_center, adj_resource_limit)
+    if key in _feasible:
+        return
+    problems = island_problems(get_topology(max_width, min_width), resources, numbers, desert_center, adj_resource_limit)
+    if problems:
+        raise InfeasibleConfigError(problems)
+    _feasible.add(key)
+
+
+def check_seafarers(*args, **kwargs):
+    """
+    Raises an InfeasibleConfigError with every problem found if the board can never be generated
+    (the arguments are the ones of seafarers_problems).
+    """
+    key = _key('seafarers', *args, **kwargs)
+    if key in _feasible:
+        return
+    problems = seafarers_problems(*args, **kwargs)
+    if problems:
+        raise InfeasibleConfigError(problems)
+    _feasible.add(key)
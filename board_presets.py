@@ -0,0 +1,231 @@
+# python3
+# board_presets.py - The map presets (presets.json), checked when they are loaded and turned into board streams.
+
+import argparse
+import json
+import os
+import sys
+
+from batch_generation import BoardSpec
+from board_errors import InfeasibleConfigError
+from board_feasibility import check_island, check_seafarers
+from board_render import render
+from board_state import DESERT, SEA, resource_code
+from board_stream import stream_boards
+from catan_board import CatanIsland
+from hex_topology import get_topology
+from seafarers_catan_board import SeafarerIslands
+
+
+PRESETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'presets.json')
+
+BOARDS = {
+    'catan': CatanIsland,
+    'seafarers': SeafarerIslands,
+}
+
+_NUMBERS = {str(number) for number in range(2, 13) if number != 7}
+
+# The presets of every file loaded so far
+_presets = {}
+
+
+class Preset:
+    """
+    One map from the presets file, checked and compiled into the BoardSpec its boards are built from.
+
+    A catan preset has:
+        shape:              [max_width, min_width] of the island
+        resources, numbers: how many of each resource and number go on the island
+        desert_center:      place the deserts in the center
+        adj_resource_limit: how many tiles of the same resource can be connected
+
+    A seafarers preset has a shape, resources (for the whole map, main island included)
+    and adj_resource_limit for the small islands, and then:
+        main_island:   shape, center, desert_center, resources and numbers of the main island
+        small_islands: count and numbers of the small islands
+
+    Every preset can have a description, and run: the stream_boards arguments
+    (threshold, limit, tries) the boards are printed with by default.
+    A preset that can never be generated (see board_feasibility) is rejected along with the rest.
+    The spec is only built once, so streaming boards from a preset doesn't rebuild any of its inputs.
+    """
+
+    def __init__(self, name, config):
+        self.name = name
+        self.description = config.get('description', '')
+        self.run = dict(config.get('run', {}))
+        board = config.get('board')
+        if board not in BOARDS:
+            self._invalid(f"board must be one of {sorted(BOARDS)}, not {board!r}")
+        self.board_class = BOARDS[board]
+        self.topology = get_topology(*self._shape(config.get('shape'), 'shape'))
+
+        if board == 'catan':
+            resources = self._resources(config.get('resources'), 'resources')
+            numbers = self._numbers(config.get('numbers'), 'numbers')
+            self._check_island(self.topology, resources, numbers, '')
+            self.spec = BoardSpec(
+                CatanIsland, self.topology.max_width, self.topology.min_width, resources, numbers,
+                desert_center=config.get('desert_center', True),
+                adj_resource_limit=config.get('adj_resource_limit', 2),
+            )
+        else:
+            resources = self._resources(config.get('resources'), 'resources')
+            main_island = config.get('main_island', {})
+            small_islands = config.get('small_islands', {})
+            main_shape = self._shape(main_island.get('shape'), 'main_island shape')
+            main_resources = self._resources(main_island.get('resources'), 'main_island resources')
+            main_numbers = self._numbers(main_island.get('numbers'), 'main_island numbers')
+            small_numbers = self._numbers(small_islands.get('numbers'), 'small_islands numbers')
+            self._check_island(get_topology(*main_shape), main_resources, main_numbers, 'main_island ')
+
+            if sum(resources.values()) < self.topology.size:
+                self._invalid(f"{sum(resources.values())} resources don't cover the {self.topology.size} tiles of the map")
+            for resource, quantity in main_resources.items():
+                if resources.get(resource, 0) < quantity:
+                    self._invalid(f"the main island has more {resource} than the whole map")
+            # The small islands' numbers aren't checked against their tiles: how many tiles they get
+            # depends on how much sea fits around them, and the numbers are handed out until
+            # either the numbers or the tiles run out
+            self.spec = BoardSpec(
+                SeafarerIslands, self.topology.max_width, self.topology.min_width,
+                resources, main_resources, main_numbers, small_numbers,
+                adj_resource_limit=config.get('adj_resource_limit', 1),
+                main_island_center=main_island.get('center', False),
+                main_island_dimensions=main_shape,
+                main_island_desert_center=main_island.get('desert_center', True),
+                num_islands=small_islands.get('count', 4),
+            )
+
+        # Catch the configs that pass the counts but can never be generated
+        check = check_island if board == 'catan' else check_seafarers
+        try:
+            check(*self.spec.args, **self.spec.kwargs)
+        except InfeasibleConfigError as error:
+            self._invalid('; '.join(error.problems))
+
+    def __repr__(self):
+        return f"Preset({self.name!r})"
+
+    def _invalid(self, problem):
+        raise ValueError(f"Preset {self.name!r}: {problem}")
+
+    def _shape(self, shape, field):
+        if (
+            not isinstance(shape, list) or len(shape) != 2 or not all(isinstance(width, int) for width in shape)
+            or not 0 < shape[1] <= shape[0]
+        ):
+            self._invalid(f"{field} must be [max_width, min_width], not {shape!r}")
+        return tuple(shape)
+
+    def _counts(self, counts, field):
+        if not isinstance(counts, dict):
+            self._invalid(f"{field} must be an object, not {counts!r}")
+        for quantity in counts.values():
+            if not isinstance(quantity, int) or quantity < 0:
+                self._invalid(f"{field} must all be whole numbers, not {quantity!r}")
+        return counts
+
+    def _resources(self, resources, field):
+        resources = self._counts(resources, field)
+        for resource in resources:
+            try:
+                resource_code(resource)
+            except ValueError as error:
+                self._invalid(f"{field}: {error}")
+        return resources
+
+    def _numbers(self, numbers, field):
+        numbers = self._counts(numbers, field)
+        for number in numbers:
+            if number not in _NUMBERS:
+                self._invalid(f"{field}: there is no {number!r} number token")
+        return numbers
+
+    def _check_island(self, topology, resources, numbers, field):
+        """
+        Every tile of an island gets a resource and every tile but the deserts (and sea) gets a number.
+        """
+        tiles = topology.size
+        total_resources = sum(resources.values())
+        dead = sum(quantity for resource, quantity in resources.items() if resource_code(resource) in (DESERT, SEA))
+        total_numbers = sum(numbers.values())
+        if total_resources != tiles:
+            self._invalid(f"{field}{total_resources} resources for {tiles} tiles")
+        if total_numbers != tiles - dead:
+            self._invalid(f"{field}{total_numbers} numbers for {tiles - dead} tiles that take a number")
+
+    def boards(self, **kwargs):
+        """
+        Lazily yields the boards of this preset (see board_stream.stream_boards for the arguments).
+        """
+        return stream_boards(self.spec, **kwargs)
+
+
+def load_presets(path=PRESETS_FILE):
+    """
+    Returns every preset in the file by name, checking all of them up front.
+    A file is only read (and checked) once.
+    """
+    path = os.path.abspath(path)
+    presets = _presets.get(path)
+    if presets is None:
+        with open(path) as presets_file:
+            config = json.load(presets_file)
+        presets = {name: Preset(name, preset) for name, preset in config.items()}
+        _presets[path] = presets
+
+    return presets
+
+
+def get_preset(name, path=PRESETS_FILE):
+    presets = load_presets(path)
+    if name not in presets:
+        raise KeyError(f"No preset named {name!r} (the presets are: {', '.join(presets)})")
+    return presets[name]
+
+
+def preset_boards(name, **kwargs):
+    """
+    Lazily yields the boards of the named preset (see board_stream.stream_boards for the arguments).
+    """
+    return get_preset(name).boards(**kwargs)
+
+
+def print_boards(name, **kwargs):
+    """
+    Prints the boards of the named preset, with the preset's run arguments unless they are given.
+    """
+    preset = get_preset(name)
+    for board in preset.boards(**{**preset.run, **kwargs}):
+        # Each board is written out in one go
+        sys.stdout.write(
+            '\n' + render(board, 'resources') + render(board, 'numbers')
+            + f'\n{board.total_diff}\n{board.total_points_per_resource}\n'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print balanced boards for a map preset.')
+    parser.add_argument('presets', nargs='*', help='presets to print (lists the presets if none are given)')
+    parser.add_argument('--threshold', type=float, help='only print boards with a total_diff under this')
+    parser.add_argument('--limit', type=int, help='how many boards to print')
+    parser.add_argument('--tries', type=int, help='how many boards to build')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if not args.presets:
+        for name, preset in load_presets().items():
+            print(f"{name:50}{preset.description}")
+        return
+    kwargs = {
+        name: value for name, value in vars(args).items()
+        if name in ('threshold', 'limit', 'tries', 'seed') and value is not None
+    }
+    for name in args.presets:
+        print_boards(name, **kwargs)
+
+
+if __name__ == "__main__":
+    main()
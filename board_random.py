@@ -0,0 +1,24 @@
+# python3
+# board_random.py - The random number generators the boards are generated with.
+
+import random
+
+
+_seed_source = random.SystemRandom()
+
+
+def make_rng(rng=None):
+    """
+    Returns (generator, seed) for the given rng, which can be:
+        None:               a new generator with a fresh seed
+        an int (or str...): a new generator seeded with it
+        a random.Random:    used as it is (the seed isn't known)
+
+    Every board owns its generator, so no two boards (or processes) share any random state,
+    and a board generated from a seed can be generated again from the same seed.
+    """
+    if isinstance(rng, random.Random):
+        return rng, None
+    if rng is None:
+        rng = _seed_source.getrandbits(64)
+    return random.Random(rng), rng
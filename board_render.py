@@ -0,0 +1,177 @@
+# python3
+# board_render.py - Draws boards as text, building each board into one string so it is written in one go.
+
+import sys
+from collections import namedtuple
+
+from board_state import RESOURCES, NO_NUMBER
+
+
+# How a kind of board is drawn on the grid (see CatanIsland.text_layout):
+#     line:           the line drawn under every row
+#     resource_width: how many letters of the resource names are shown
+#     number_blank:   what a cell without a number is drawn as on the numbers grid
+TextLayout = namedtuple('TextLayout', ['line', 'resource_width', 'number_blank'])
+
+STYLES = ('resources', 'numbers', 'combined', 'hex')
+
+# What the cells of the grid without a tile in them (like the ones between the tiles of a row) are drawn as
+_BLANK = '  '
+
+# The width of a tile in the hex style, in half tiles (rows are offset from each other by half a tile)
+_HEX_HALF = 3
+
+# The cells of every tile for each topology, so the layout is only worked out once per shape:
+# (row of (tile, cells before it), cells after the last tile) for every row
+_row_layouts = {}
+
+
+def _rows(topology):
+    layout = _row_layouts.get(topology)
+    if layout is None:
+        layout = []
+        for row in topology.rows:
+            cells = []
+            x = 0
+            for tile in row:
+                tile_x = topology.coords[tile][0]
+                cells.append((tile, tile_x - x))
+                x = tile_x + 1
+            layout.append((tuple(cells), topology.horizontal - x))
+        layout = tuple(layout)
+        _row_layouts[topology] = layout
+
+    return layout
+
+
+def _grid(board, cell, blank):
+    """
+    Draws the tiles on the grid with the line under every row, where cell gives the text of a tile
+    (or None to leave it blank) and every cell without a tile is drawn as blank.
+    Only the tiles are looked at, the cells between them are filled in from the layout.
+    """
+    line = '\n' + board.text_layout.line * board.horizontal + '\n'
+    parts = []
+    for cells, after in _rows(board.topology):
+        for tile, before in cells:
+            text = cell(tile)
+            parts.append(blank * before + (blank if text is None else text))
+        parts.append(blank * after + line)
+
+    return ''.join(parts)
+
+
+def _resource_label(board, resource):
+    return RESOURCES[resource][:board.text_layout.resource_width]
+
+
+def render_resources(board):
+    """
+    The resources on the grid, like print_resources has always drawn them.
+    """
+    resources = board.state.resources
+    return '\n' + _grid(board, lambda tile: f'| {_resource_label(board, resources[tile])} |' if resources[tile] else None, _BLANK)
+
+
+def render_numbers(board):
+    """
+    The numbers on the grid, like print_numbers has always drawn them.
+    """
+    numbers = board.state.numbers
+    header = ''.join(f"{resource}: {sum(point_list)} " for resource, point_list in board.resource_points.items())
+    return (
+        '\n' + header + '\n'
+        + _grid(board, lambda tile: f'| {numbers[tile]} |' if numbers[tile] != NO_NUMBER else None, board.text_layout.number_blank)
+    )
+
+
+def render_combined(board):
+    """
+    The resource and number of every tile together on the grid.
+    """
+    resources = board.state.resources
+    numbers = board.state.numbers
+
+    def cell(tile):
+        if not resources[tile]:
+            return None
+        number = numbers[tile] if numbers[tile] != NO_NUMBER else ''
+        return f'| {_resource_label(board, resources[tile]):{board.text_layout.resource_width}}{number:>3} |'
+
+    return '\n' + _grid(board, cell, _BLANK)
+
+
+def render_hex(board):
+    """
+    The resource and number of every tile with the rows offset by half a tile, the way the hexes sit on the board.
+    """
+    topology = board.topology
+    resources = board.state.resources
+    numbers = board.state.numbers
+    lines = []
+    for row in topology.rows:
+        parts = []
+        column = 0
+        for tile in row:
+            x = topology.coords[tile][0]
+            number = numbers[tile] if numbers[tile] != NO_NUMBER else ''
+            resource = RESOURCES[resources[tile]] or ''
+            parts.append(' ' * (x * _HEX_HALF - column) + f'{resource[:2]:2}{number:>2}  ')
+            column = (x + 2) * _HEX_HALF
+        lines.append(''.join(parts).rstrip())
+
+    return '\n'.join(lines) + '\n'
+
+
+_RENDERERS = {
+    'resources': render_resources,
+    'numbers': render_numbers,
+    'combined': render_combined,
+    'hex': render_hex,
+}
+
+
+def _renderer(style):
+    if style not in _RENDERERS:
+        raise ValueError(f"No {style!r} style (the styles are: {', '.join(STYLES)})")
+    return _RENDERERS[style]
+
+
+def render(board, style='resources'):
+    """
+    Returns the board drawn in the given style (one of STYLES) as a string.
+    """
+    return _renderer(style)(board)
+
+
+def write_board(board, stream=None, style='resources'):
+    """
+    Writes the board drawn in the given style to the stream (stdout by default) with a single write.
+    """
+    (sys.stdout if stream is None else stream).write(render(board, style))
+
+
+def write_boards(boards, stream=None, style='resources', buffer_size=1 << 16):
+    """
+    Writes every board drawn in the given style to the stream (stdout by default),
+    gathering them up into writes of about buffer_size characters.
+    Returns how many boards were written.
+    """
+    stream = sys.stdout if stream is None else stream
+    renderer = _renderer(style)
+    parts = []
+    size = 0
+    written = 0
+    for board in boards:
+        text = renderer(board)
+        parts.append(text)
+        size += len(text)
+        written += 1
+        if size >= buffer_size:
+            stream.write(''.join(parts))
+            parts = []
+            size = 0
+    if parts:
+        stream.write(''.join(parts))
+
+    return written
@@ -0,0 +1,201 @@
+# python3
+# board_serialization.py - Saving boards as versioned JSON or packed binary, and loading them back
+# without running any of the placement.
+
+import json
+
+from board_state import RESOURCES, SEA, NO_NUMBER, number_name
+from catan_board import CatanIsland
+from seafarers_catan_board import SeafarerIslands
+
+
+FORMAT = 'catan-board'
+VERSION = 1
+
+# The flags in the low bits of the first byte of a packed board (the version is in the high bits)
+_HAS_SEED = 1
+_SEAFARERS = 2
+
+_SEED_BYTES = 8
+
+
+def board_type(board):
+    return 'seafarers' if isinstance(board, SeafarerIslands) else 'catan'
+
+
+def to_json(board):
+    """
+    Returns the board as a JSON-ready dictionary:
+
+        format, version:  'catan-board' and the version of the format
+        board:            'catan' or 'seafarers'
+        shape:            [max_width, min_width]
+        seed:             the seed the board was generated from (None if it isn't known)
+        total_diff:       how balanced the board is (only for reading, it is worked out again when loading)
+        main_island:      the shape of the main island and if it is in the center (seafarers only)
+        tiles:            the label, resource and number of every tile, in tile order (row by row)
+    """
+    state = board.state
+    labels = board.topology.positions
+    data = {
+        'format': FORMAT,
+        'version': VERSION,
+        'board': board_type(board),
+        'shape': [board.max_width, board.min_width],
+        'seed': board.seed,
+        'total_diff': board.total_diff,
+    }
+    if isinstance(board, SeafarerIslands):
+        data['main_island'] = {'shape': list(board.main_island_dimensions), 'center': bool(board.main_island_center)}
+    data['tiles'] = [
+        {'tile': labels[tile], 'resource': RESOURCES[state.resources[tile]], 'number': number_name(state.numbers[tile])}
+        for tile in range(board.topology.size)
+    ]
+
+    return data
+
+
+def dumps(board, **kwargs):
+    """
+    Returns the board as a JSON string (see to_json), with any json.dumps arguments.
+    """
+    return json.dumps(to_json(board), **kwargs)
+
+
+def from_json(data):
+    """
+    Loads a board from its to_json dictionary (or a JSON string of it).
+    """
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    if data.get('format') != FORMAT:
+        raise ValueError(f"Not a board: the format is {data.get('format')!r}, not {FORMAT!r}")
+    if data.get('version') != VERSION:
+        raise ValueError(f"Can't load version {data.get('version')!r} boards (only version {VERSION})")
+
+    resources = [tile['resource'] for tile in data['tiles']]
+    numbers = [tile['number'] for tile in data['tiles']]
+    max_width, min_width = data['shape']
+    if data['board'] == 'seafarers':
+        main_island = data['main_island']
+        board = SeafarerIslands.from_layout(
+            max_width, min_width, resources, numbers, tuple(main_island['shape']), main_island['center'],
+        )
+    else:
+        board = CatanIsland.from_layout(max_width, min_width, resources, numbers)
+    board.seed = data.get('seed')
+
+    return board
+
+
+def _pack_nibbles(values):
+    if len(values) % 2:
+        values = list(values) + [0]
+    return bytes((values[i] << 4) | values[i + 1] for i in range(0, len(values), 2))
+
+
+def _unpack_nibbles(data, offset, count):
+    values = []
+    for byte in data[offset:offset + (count + 1) // 2]:
+        values.append(byte >> 4)
+        values.append(byte & 15)
+    if len(values) < count:
+        raise ValueError("The packed board is cut short")
+
+    return values[:count], offset + (count + 1) // 2
+
+
+def pack(board, seed=True):
+    """
+    Packs the board into bytes (about 30 for the base game, 22 without the seed):
+
+        1 byte:    the version (high 4 bits) and flags: has a seed, is a seafarers board
+        2 bytes:   max_width, min_width
+        2 bytes:   the main island's max_width, and min_width with the top bit set if it is in the center (seafarers only)
+        8 bytes:   the seed (only if there is one and seed is True)
+        4 bits:    the resource code of every tile, in tile order
+        4 bits:    the number of every tile that takes one (every tile but the deserts and sea), in tile order
+
+    A packed board knows its own length, so packed boards can simply be written one after the other (see unpack_all).
+    """
+    state = board.state
+    flags = 0
+    head = [board.max_width, board.min_width]
+    if isinstance(board, SeafarerIslands):
+        flags |= _SEAFARERS
+        main_max_width, main_min_width = board.main_island_dimensions
+        head += [main_max_width, main_min_width | (0x80 if board.main_island_center else 0)]
+    if seed and board.seed is not None:
+        if not isinstance(board.seed, int) or not 0 <= board.seed < 1 << (8 * _SEED_BYTES):
+            raise ValueError(f"Only seeds from 0 to 2**64 - 1 can be packed, not {board.seed!r}")
+        flags |= _HAS_SEED
+
+    packed = bytes([(VERSION << 4) | flags] + head)
+    if flags & _HAS_SEED:
+        packed += board.seed.to_bytes(_SEED_BYTES, 'little')
+    packed += _pack_nibbles(state.resources)
+    packed += _pack_nibbles([number for resource, number in zip(state.resources, state.numbers) if resource > SEA])
+
+    return packed
+
+
+def _unpack(data, offset=0):
+    """
+    Returns the board packed at offset in data, and the offset after it.
+    """
+    if offset + 3 > len(data):
+        raise ValueError("The packed board is cut short")
+    version, flags = data[offset] >> 4, data[offset] & 15
+    if version != VERSION:
+        raise ValueError(f"Can't unpack version {version} boards (only version {VERSION})")
+    max_width, min_width = data[offset + 1], data[offset + 2]
+    offset += 3
+    if flags & _SEAFARERS:
+        main_max_width, main_min_width = data[offset], data[offset + 1]
+        offset += 2
+    seed = None
+    if flags & _HAS_SEED:
+        seed = int.from_bytes(data[offset:offset + _SEED_BYTES], 'little')
+        offset += _SEED_BYTES
+
+    if flags & _SEAFARERS:
+        board = SeafarerIslands.from_layout(
+            max_width, min_width, [], [], (main_max_width, main_min_width & 0x7f), bool(main_min_width & 0x80),
+        )
+    else:
+        board = CatanIsland.from_layout(max_width, min_width, [], [])
+    state = board.state
+    resources, offset = _unpack_nibbles(data, offset, board.topology.size)
+    live = [tile for tile, resource in enumerate(resources) if resource > SEA]
+    numbers, offset = _unpack_nibbles(data, offset, len(live))
+
+    for tile, resource in enumerate(resources):
+        state.set_resource(tile, resource)
+    for tile, number in zip(live, numbers):
+        if number != NO_NUMBER:
+            state.set_number(tile, number)
+    if flags & _SEAFARERS:
+        board._set_small_islands()
+    board.seed = seed
+
+    return board, offset
+
+
+def unpack(data):
+    """
+    Loads a board from its packed bytes.
+    """
+    board, offset = _unpack(data)
+    if offset != len(data):
+        raise ValueError(f"{len(data) - offset} bytes are left over after the packed board")
+    return board
+
+
+def unpack_all(data):
+    """
+    Lazily yields the boards packed one after the other in data (like a file of packed boards).
+    """
+    offset = 0
+    while offset < len(data):
+        board, offset = _unpack(data, offset)
+        yield board
@@ -0,0 +1,330 @@
+# python3
+# board_service.py - An asyncio HTTP service that hands out boards from warm pools of pre-generated boards,
+# one pool per preset, refilled by worker processes.
+
+import argparse
+import asyncio
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from time import monotonic
+from urllib.parse import parse_qs, urlsplit
+
+from board_presets import get_preset, load_presets, preset_boards
+from board_state import RESOURCES, number_name
+
+
+# How far back (in seconds) the generation rate in the metrics looks
+RATE_WINDOW = 60
+
+_REASONS = {
+    200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed', 400: 'Bad Request', 408: 'Request Timeout',
+    503: 'Service Unavailable',
+}
+
+
+def _generate_records(name, count, threshold):
+    """
+    Generates the records of count boards of the named preset (run in the worker processes).
+    """
+    return list(preset_boards(name, threshold=threshold, limit=count, records=True))
+
+
+def record_json(preset, record):
+    """
+    The JSON a board is served as: its preset, score, seed, kind ('catan' or 'seafarers') and shape,
+    the shape of the main island and if it is in the center (seafarers boards only, None for the others),
+    and the resource and number of every tile (in tile order, row by row).
+    """
+    main_island = None
+    if record.main_island is not None:
+        main_max_width, main_min_width, main_center = record.main_island
+        main_island = {'shape': [main_max_width, main_min_width], 'center': main_center}
+    return {
+        'preset': preset,
+        'total_diff': record.total_diff,
+        'seed': record.seed,
+        'board': record.board,
+        'shape': [record.max_width, record.min_width],
+        'main_island': main_island,
+        'resources': [RESOURCES[resource] for resource in record.resources],
+        'numbers': [number_name(number) for number in record.numbers],
+    }
+
+
+class BoardPool:
+    """
+    The boards of one preset ready to be handed out.
+
+    The pool is refilled (in batches of batch_size) up to size boards whenever it drops under low.
+    A request that finds the pool empty waits for the next board, in the order the requests came in,
+    but no more than max_waiting requests wait at a time: past that the pool is drained
+    and requests are turned away straight away (see BoardService).
+    """
+
+    def __init__(self, preset, size, low, batch_size, threshold, max_waiting):
+        self.preset = preset
+        self.size = size
+        self.low = low
+        self.batch_size = batch_size
+        self.threshold = threshold
+        self.max_waiting = max_waiting
+        self.records = deque()
+        self.waiters = deque()
+        self.in_flight = 0
+        self.generated = 0
+        self.served = 0
+        self.rejected = 0
+        self.errors = 0
+        self.started = monotonic()
+        # (time, boards) of every batch generated within the last RATE_WINDOW seconds
+        self.batches = deque()
+
+    def missing(self):
+        """
+        How many more boards have to be asked for to fill the pool, with the batches on their way.
+        """
+        return self.size - len(self.records) - self.in_flight * self.batch_size
+
+    def waiting(self):
+        """
+        How many requests are waiting for a board (dropping the ones that gave up).
+        """
+        while self.waiters and self.waiters[0].done():
+            self.waiters.popleft()
+        return sum(1 for waiter in self.waiters if not waiter.done())
+
+    def add(self, records):
+        now = monotonic()
+        self.generated += len(records)
+        self.batches.append((now, len(records)))
+        while self.batches and self.batches[0][0] < now - RATE_WINDOW:
+            self.batches.popleft()
+        for record in records:
+            # Hand the boards to the waiting requests first
+            if self.waiting():
+                self.waiters.popleft().set_result(record)
+            else:
+                self.records.append(record)
+
+    def metrics(self):
+        now = monotonic()
+        recent = sum(boards for time, boards in self.batches if time >= now - RATE_WINDOW)
+        return {
+            'depth': len(self.records),
+            'size': self.size,
+            'low': self.low,
+            'in_flight': self.in_flight * self.batch_size,
+            'waiting': self.waiting(),
+            'generated': self.generated,
+            'served': self.served,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'boards_per_second': recent / min(RATE_WINDOW, max(now - self.started, 1e-9)),
+        }
+
+
+class BoardService:
+    """
+    Serves boards over HTTP from a BoardPool per preset (every preset unless presets are given):
+        GET /boards/<preset>   a board of the preset as JSON (see record_json)
+        GET /presets           the presets served and the description of each
+        GET /metrics           the depth, generation rate and counts of every pool
+
+    The boards are generated by a pool of processes worker processes, so handing them out never waits
+    on a generation run unless the pool is empty. Boards are only kept if their total_diff is under
+    the threshold of the preset's run arguments (see board_presets), unless thresholds are given by preset.
+    When a pool is empty a request waits up to wait seconds for a board, and when max_waiting requests
+    are already waiting it is answered with a 503 (and Retry-After) straight away.
+    A client that doesn't send its whole request (the request line and headers) within read_timeout seconds
+    is answered with a 408 and its connection closed.
+    """
+
+    def __init__(self, presets=None, pool_size=32, low=None, batch_size=8, processes=None, wait=5.0,
+            max_waiting=64, thresholds=None, read_timeout=10.0):
+        presets = list(load_presets()) if presets is None else list(presets)
+        thresholds = thresholds or {}
+        low = pool_size // 2 if low is None else low
+        self.pools = {}
+        for name in presets:
+            threshold = thresholds.get(name, get_preset(name).run.get('threshold'))
+            self.pools[name] = BoardPool(name, pool_size, low, batch_size, threshold, max_waiting)
+        self.processes = processes or cpu_count() or 1
+        self.wait = wait
+        self.read_timeout = read_timeout
+        self.executor = None
+        self.server = None
+        self._tasks = set()
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """
+        Starts the worker processes filling the pools and the server, returning the asyncio server.
+        """
+        self.executor = ProcessPoolExecutor(self.processes)
+        for pool in self.pools.values():
+            self._refill(pool)
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def ready(self):
+        """
+        Waits until every pool is full.
+        """
+        while any(len(pool.records) < pool.size for pool in self.pools.values()):
+            await asyncio.sleep(0.05)
+
+    def _refill(self, pool):
+        while pool.missing() > 0 and pool.in_flight < self.processes:
+            pool.in_flight += 1
+            task = asyncio.get_running_loop().create_task(self._generate(pool))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _generate(self, pool):
+        loop = asyncio.get_running_loop()
+        try:
+            records = await loop.run_in_executor(
+                self.executor, _generate_records, pool.preset, pool.batch_size, pool.threshold,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pool.errors += 1
+            pool.in_flight -= 1
+            # Don't spin on a failing worker
+            await asyncio.sleep(1)
+            self._refill(pool)
+            return
+        pool.in_flight -= 1
+        pool.add(records)
+        self._refill(pool)
+
+    async def board(self, name):
+        """
+        Returns the record of a board of the preset, or None if none could be handed out in time.
+        """
+        pool = self.pools[name]
+        if pool.records:
+            record = pool.records.popleft()
+        elif pool.waiting() >= pool.max_waiting:
+            record = None
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            pool.waiters.append(waiter)
+            try:
+                record = await asyncio.wait_for(asyncio.shield(waiter), self.wait)
+            except asyncio.TimeoutError:
+                # A board may have been handed over just as the time ran out
+                record = waiter.result() if waiter.done() else None
+                waiter.cancel()
+        if len(pool.records) < pool.low:
+            self._refill(pool)
+
+        if record is None:
+            pool.rejected += 1
+        else:
+            pool.served += 1
+        return record
+
+    async def _read_request(self, reader):
+        """
+        Reads the request line, skipping the headers (nothing in them is needed).
+        """
+        request = await reader.readline()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        return request.decode('latin-1').split()
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                request = await asyncio.wait_for(self._read_request(reader), self.read_timeout)
+            except asyncio.TimeoutError:
+                status, body, headers = 408, {'error': 'the request took too long to arrive'}, {}
+            except (ValueError, asyncio.LimitOverrunError):
+                # A line longer than the stream's limit
+                status, body, headers = 400, {'error': 'the request is too long'}, {}
+            else:
+                status, body, headers = await self._respond(request)
+            data = json.dumps(body).encode()
+            head = [f'HTTP/1.1 {status} {_REASONS[status]}', 'Content-Type: application/json',
+                f'Content-Length: {len(data)}', 'Connection: close']
+            head += [f'{name}: {value}' for name, value in headers.items()]
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request):
+        if len(request) != 3:
+            return 400, {'error': 'bad request'}, {}
+        method, target, version = request
+        if method != 'GET':
+            return 405, {'error': f'{method} is not supported'}, {'Allow': 'GET'}
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+
+        if parts == ['presets']:
+            return 200, {name: get_preset(name).description for name in self.pools}, {}
+        if parts == ['metrics']:
+            return 200, {'processes': self.processes, 'pools': {name: pool.metrics() for name, pool in self.pools.items()}}, {}
+        if len(parts) == 2 and parts[0] == 'boards':
+            name = parts[1]
+            if name not in self.pools:
+                return 404, {'error': f'no preset named {name!r}'}, {}
+            count = parse_qs(url.query).get('count', ['1'])[0]
+            if not count.isdigit() or not 1 <= int(count) <= self.pools[name].size:
+                return 400, {'error': f'count must be from 1 to {self.pools[name].size}'}, {}
+            boards = []
+            for i in range(int(count)):
+                record = await self.board(name)
+                if record is None:
+                    break
+                boards.append(record_json(name, record))
+            if not boards:
+                return 503, {'error': f'no {name} boards are ready, try again shortly'}, {'Retry-After': '1'}
+            return 200, boards[0] if count == '1' else boards, {}
+
+        return 404, {'error': f'nothing at {url.path}'}, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve balanced boards over HTTP from warm pools.')
+    parser.add_argument('presets', nargs='*', help='presets to serve (all of them if none are given)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pool-size', type=int, default=32, help='how many boards to keep ready per preset')
+    parser.add_argument('--processes', type=int, help='how many worker processes generate the boards')
+    parser.add_argument('--read-timeout', type=float, default=10.0, help='seconds a client has to send its request')
+    args = parser.parse_args()
+
+    async def serve():
+        service = BoardService(args.presets or None, pool_size=args.pool_size, processes=args.processes,
+            read_timeout=args.read_timeout)
+        server = await service.start(args.host, args.port)
+        print(f"Serving {', '.join(service.pools)} on http://{args.host}:{args.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# python3
+# board_simulation.py - Simulates the dice of many games on a board with NumPy, to see how much each resource,
+# intersection and starting position produces and how much that changes from game to game.
+
+import numpy as np
+
+from board_state import RESOURCES, SEA
+
+
+# The chance of rolling each total with two dice (by total, 0 to 12)
+ROLL_CHANCES = np.array([0, 0, 1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1]) / 36
+
+# The (vertices x tiles) matrix of which tiles touch each vertex, for every topology
+_incidence = {}
+
+
+def roll_counts(games=1000, turns=60, seed=None):
+    """
+    Returns a (games x 13) array of how many times each total comes up in each game of turns rolls of two dice.
+    The counts are drawn straight from the multinomial distribution of the totals, which is the same as
+    rolling the dice turns times in every game, without making an array of every roll.
+    """
+    return np.random.default_rng(seed).multinomial(turns, ROLL_CHANCES, size=games)
+
+
+def _vertex_incidence(topology):
+    incidence = _incidence.get(topology)
+    if incidence is None:
+        graph = topology.graph
+        incidence = np.zeros((graph.size, topology.size))
+        for vertex, tiles in enumerate(graph.vertex_tiles):
+            incidence[vertex, list(tiles)] = 1
+        _incidence[topology] = incidence
+
+    return incidence
+
+
+def tile_production(board, counts):
+    """
+    Returns a (games x tiles) array of how many resources each tile gives a settlement next to it in each game
+    (the robber is left out, so a tile gives one every time its number is rolled).
+    """
+    numbers = np.frombuffer(board.state.numbers, dtype=np.uint8)
+    # Tiles without a number look up the count of rolling 0, which is always 0
+    return counts[:, numbers]
+
+
+def _starting_positions(graph, vertex_mean, players, settlements):
+    """
+    Picks the starting settlements the way players usually do: in turn, then in the reverse order for
+    the next round (and so on), each taking the intersection that produces the most
+    that isn't next to or on a settlement already taken.
+    """
+    order = [vertex for vertex in np.argsort(-vertex_mean, kind='stable') if vertex_mean[vertex] > 0]
+    blocked = set()
+    positions = [[] for player in range(players)]
+    for round_number in range(settlements):
+        turn_order = range(players) if round_number % 2 == 0 else reversed(range(players))
+        for player in turn_order:
+            for vertex in order:
+                if vertex not in blocked:
+                    positions[player].append(int(vertex))
+                    blocked.add(vertex)
+                    blocked.update(graph.vertex_neighbors[vertex])
+                    break
+
+    return [tuple(player_positions) for player_positions in positions]
+
+
+def simulate(board, games=1000, turns=60, players=4, settlements=2, seed=None, counts=None):
+    """
+    Simulates games of turns rolls each on the board (or uses the given roll_counts)
+    and returns a dictionary of what gets produced per game:
+
+        resource_mean, resource_variance:  {resource: ...} for every resource on the board (the dead tiles left out)
+        vertex_mean, vertex_variance:      arrays with an entry per vertex of board.topology.graph,
+                                           for a settlement on that vertex
+        positions:                         the vertices of every player's starting settlements (see _starting_positions)
+        player_mean, player_variance:      arrays with an entry per player, for their starting settlements together
+        fairness:                          the most any player produces minus the least (on average),
+                                           the lower the fairer the starting positions are
+    """
+    if counts is None:
+        counts = roll_counts(games, turns, seed)
+    topology = board.topology
+    produced = tile_production(board, counts)
+
+    resources = np.frombuffer(board.state.resources, dtype=np.uint8)
+    resource_production = {}
+    for resource in np.unique(resources):
+        if resource > SEA:
+            resource_production[RESOURCES[resource]] = produced[:, resources == resource].sum(axis=1)
+
+    vertex_production = produced @ _vertex_incidence(topology).T
+    vertex_mean = vertex_production.mean(axis=0)
+    positions = _starting_positions(topology.graph, vertex_mean, players, settlements)
+    player_production = np.stack(
+        [vertex_production[:, list(player_positions)].sum(axis=1) for player_positions in positions], axis=1,
+    )
+    player_mean = player_production.mean(axis=0)
+
+    return {
+        'resource_mean': {resource: float(total.mean()) for resource, total in resource_production.items()},
+        'resource_variance': {resource: float(total.var()) for resource, total in resource_production.items()},
+        'vertex_mean': vertex_mean,
+        'vertex_variance': vertex_production.var(axis=0),
+        'positions': positions,
+        'player_mean': player_mean,
+        'player_variance': player_production.var(axis=0),
+        'fairness': float(player_mean.max() - player_mean.min()),
+    }
+
+
+def fairness_filter(max_fairness, games=500, turns=60, players=4, settlements=2, seed=0):
+    """
+    Returns a filter for board_stream.stream_boards (or anything that takes a function of a board)
+    that keeps the boards whose starting positions are fair to within max_fairness (see simulate).
+    The dice are only rolled once, and every board is judged on the same rolls.
+    """
+    counts = roll_counts(games, turns, seed)
+
+    def keep(board):
+        return simulate(board, players=players, settlements=settlements, counts=counts)['fairness'] <= max_fairness
+
+    return keep
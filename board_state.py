@@ -0,0 +1,303 @@
+# python3
+# board_state.py - Compact, array backed state of a Catan board (resources, numbers and points per tile).
+
+from array import array
+
+
+# Every resource is stored as a small integer code.
+# The dead tiles (no resource yet, desert and sea) have the lowest codes
+# so checking for a dead tile is a single comparison (code <= SEA).
+RESOURCES = (None, 'Desert', 'Sea', 'Brick', 'Wood', 'Ore', 'Grain', 'Sheep', 'Gold')
+RESOURCE_CODES = {resource: code for code, resource in enumerate(RESOURCES)}
+EMPTY = RESOURCE_CODES[None]
+DESERT = RESOURCE_CODES['Desert']
+SEA = RESOURCE_CODES['Sea']
+GOLD = RESOURCE_CODES['Gold']
+
+# Numbers are stored as the number on the token itself (0 for no number)
+# and are used to look up how many points each token is worth.
+NO_NUMBER = 0
+NUMBER_POINTS = (0, 0, 1, 2, 3, 4, 5, 0, 5, 4, 3, 2, 1)
+
+
+def resource_code(resource):
+    """
+    Returns the code for the given resource name.
+    """
+    try:
+        return RESOURCE_CODES[resource]
+    except KeyError:
+        raise ValueError(f"Unknown resource: {resource!r}") from None
+
+
+def number_code(number):
+    """
+    Returns the code for the given number token ('8' -> 8, None -> 0).
+    """
+    if number is None:
+        return NO_NUMBER
+    return int(number)
+
+
+def number_name(code):
+    """
+    Returns the number token for the given code (8 -> '8', 0 -> None).
+    """
+    if code == NO_NUMBER:
+        return None
+    return str(code)
+
+
+class BoardState:
+    """
+    The per board state of an island: one resource code, one number
+    and one point value for every tile in the topology.
+    Everything about the shape of the island lives in the (shared) topology,
+    so this is all a board needs to carry around.
+    """
+
+    __slots__ = (
+        'topology', 'resources', 'numbers', 'points', 'resource_tiles', 'resource_points', 'vertex_points',
+        'tile_islands', 'island_tiles', 'island_points', 'version', '_tiles',
+    )
+
+    def __init__(self, topology):
+        self.topology = topology
+        self.resources = array('B', bytes(topology.size))
+        self.numbers = array('B', bytes(topology.size))
+        self.points = array('B', bytes(topology.size))
+        # How many tiles and how many points each resource (by code) has,
+        # kept up to date as numbers are placed and reset
+        self.resource_tiles = [0] * len(RESOURCES)
+        self.resource_tiles[EMPTY] = topology.size
+        self.resource_points = [0] * len(RESOURCES)
+        # How many points the tiles around each vertex (see VertexGraph) add up to,
+        # kept up to date the same way
+        self.vertex_points = array('B', bytes(topology.graph.size))
+        # The island every tile is on (all of them are on island 0 unless set_islands says otherwise),
+        # and how many tiles and points each resource has on each island, kept up to date the same way
+        self.tile_islands = array('B', bytes(topology.size))
+        self.island_tiles = [list(self.resource_tiles)]
+        self.island_points = [[0] * len(RESOURCES)]
+        # Goes up every time the board changes, for anything cached off the board
+        self.version = 0
+        self._tiles = None
+
+    def __getstate__(self):
+        # The tile views are rebuilt when they are needed
+        return (
+            self.topology, self.resources, self.numbers, self.points,
+            self.resource_tiles, self.resource_points, self.vertex_points,
+            self.tile_islands, self.island_tiles, self.island_points, self.version,
+        )
+
+    def __setstate__(self, state):
+        (
+            self.topology, self.resources, self.numbers, self.points,
+            self.resource_tiles, self.resource_points, self.vertex_points,
+            self.tile_islands, self.island_tiles, self.island_points, self.version,
+        ) = state
+        self._tiles = None
+
+    def count_resources(self):
+        """
+        Recounts the tiles and points of each resource (on the whole board and on each island).
+        Resource placement writes straight into the resources array,
+        so this is run once the resources are in place.
+        """
+        resource_tiles = [0] * len(RESOURCES)
+        resource_points = [0] * len(RESOURCES)
+        island_tiles = [[0] * len(RESOURCES) for island in self.island_tiles]
+        island_points = [[0] * len(RESOURCES) for island in self.island_points]
+        for resource, points, island in zip(self.resources, self.points, self.tile_islands):
+            resource_tiles[resource] += 1
+            resource_points[resource] += points
+            island_tiles[island][resource] += 1
+            island_points[island][resource] += points
+        self.resource_tiles = resource_tiles
+        self.resource_points = resource_points
+        self.island_tiles = island_tiles
+        self.island_points = island_points
+        self.version += 1
+
+    def set_islands(self, tile_islands, islands):
+        """
+        Puts every tile on an island (tile_islands gives the island of each tile, from 0 to islands - 1)
+        and recounts the tiles and points of each resource on each island.
+        """
+        self.tile_islands = array('B', tile_islands)
+        self.island_tiles = [None] * islands
+        self.island_points = [None] * islands
+        self.count_resources()
+
+    def tiles(self):
+        """
+        Returns a Tile view for every tile on the board.
+        The views are only created the first time they are asked for.
+        """
+        if self._tiles is None:
+            self._tiles = [Tile(self, i) for i in range(self.topology.size)]
+        return self._tiles
+
+    def tile(self, index):
+        if index is None:
+            return None
+        return self.tiles()[index]
+
+    def set_resource(self, index, resource):
+        """
+        Places a resource (by code) on the tile, moving its points over to the new resource.
+        """
+        old_resource = self.resources[index]
+        points = self.points[index]
+        island = self.tile_islands[index]
+        island_tiles = self.island_tiles[island]
+        island_points = self.island_points[island]
+        self.resource_tiles[old_resource] -= 1
+        self.resource_points[old_resource] -= points
+        island_tiles[old_resource] -= 1
+        island_points[old_resource] -= points
+        self.resources[index] = resource
+        self.resource_tiles[resource] += 1
+        self.resource_points[resource] += points
+        island_tiles[resource] += 1
+        island_points[resource] += points
+        self.version += 1
+
+    def set_number(self, index, number):
+        """
+        Places a number (by code) on the tile and updates its points.
+        """
+        points = NUMBER_POINTS[number]
+        change = points - self.points[index]
+        resource = self.resources[index]
+        self.resource_points[resource] += change
+        self.island_points[self.tile_islands[index]][resource] += change
+        vertex_points = self.vertex_points
+        for vertex in self.topology.graph.tile_vertices[index]:
+            vertex_points[vertex] += change
+        self.numbers[index] = number
+        self.points[index] = points
+        self.version += 1
+
+    def set_points(self, index, points):
+        change = points - self.points[index]
+        resource = self.resources[index]
+        self.resource_points[resource] += change
+        self.island_points[self.tile_islands[index]][resource] += change
+        vertex_points = self.vertex_points
+        for vertex in self.topology.graph.tile_vertices[index]:
+            vertex_points[vertex] += change
+        self.points[index] = points
+        self.version += 1
+
+    def clear_numbers(self, indices):
+        resources = self.resources
+        resource_points = self.resource_points
+        island_points = self.island_points
+        tile_islands = self.tile_islands
+        vertex_points = self.vertex_points
+        tile_vertices = self.topology.graph.tile_vertices
+        for i in indices:
+            resource_points[resources[i]] -= self.points[i]
+            island_points[tile_islands[i]][resources[i]] -= self.points[i]
+            for vertex in tile_vertices[i]:
+                vertex_points[vertex] -= self.points[i]
+            self.numbers[i] = NO_NUMBER
+            self.points[i] = 0
+        self.version += 1
+
+
+class Tile:
+    """
+    Tile class from which the Catan Board is created.
+    This is a hexagonal tile, with the positional relationships defined as:
+    right, top_right, top_left, left, bottom_left, bottom_right
+
+    A tile is a view onto one index of a BoardState,
+    reading and setting its attributes reads and writes the board arrays.
+    """
+
+    __slots__ = ('state', 'index')
+
+    def __init__(self, state, index):
+        self.state = state
+        self.index = index
+
+    def __repr__(self):
+        return f"Tile({self.pos}, {self.resource}, {self.number})"
+
+    # Positional inputs:
+    @property
+    def x(self):
+        return self.state.topology.coords[self.index][0]
+
+    @property
+    def y(self):
+        return self.state.topology.coords[self.index][1]
+
+    @property
+    def pos(self):
+        return self.state.topology.positions[self.index]
+
+    @property
+    def axial(self):
+        return self.state.topology.axial[self.index]
+
+    # Catan Inputs
+    @property
+    def resource(self):
+        return RESOURCES[self.state.resources[self.index]]
+
+    @resource.setter
+    def resource(self, resource):
+        self.state.set_resource(self.index, resource_code(resource))
+
+    @property
+    def number(self):
+        return number_name(self.state.numbers[self.index])
+
+    @number.setter
+    def number(self, number):
+        self.state.set_number(self.index, number_code(number))
+
+    @property
+    def points(self):
+        return self.state.points[self.index]
+
+    @points.setter
+    def points(self, points):
+        self.state.set_points(self.index, points)
+
+    # positional relationships
+    def _neighbor(self, direction):
+        return self.state.tile(self.state.topology.neighbors[self.index][direction])
+
+    @property
+    def right(self):
+        return self._neighbor(0)
+
+    @property
+    def top_right(self):
+        return self._neighbor(1)
+
+    @property
+    def top_left(self):
+        return self._neighbor(2)
+
+    @property
+    def left(self):
+        return self._neighbor(3)
+
+    @property
+    def bottom_left(self):
+        return self._neighbor(4)
+
+    @property
+    def bottom_right(self):
+        return self._neighbor(5)
+
+    @property
+    def possible_adjacents(self):
+        tiles = self.state.tiles()
+        return [tiles[n] for n in self.state.topology.adjacents[self.index]]
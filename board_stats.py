@@ -0,0 +1,65 @@
+# python3
+# board_stats.py - Optional counters and phase timings recorded while boards are generated.
+
+import json
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+_NO_PHASE = nullcontext()
+
+
+class BoardStats:
+    """
+    Counts the retries, resets and restarts made while generating boards
+    and times each phase of the generation (grid, resources, numbers).
+
+    Pass one to a board with stats=BoardStats() to record into it.
+    One stats object can be shared by any number of boards to get the totals for a whole run.
+    Boards made without stats skip all of this (the boards only ever check if stats is None),
+    and the hot loops keep their counts in local variables that are only recorded once at the end.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the code run inside the with block as the given phase.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + perf_counter() - start
+
+    def merge(self, other):
+        """
+        Adds the counts and timings of another stats object (or its to_dict) into this one.
+        """
+        if isinstance(other, BoardStats):
+            other = other.to_dict()
+        for name, amount in other['counters'].items():
+            self.count(name, amount)
+        for name, seconds in other['timings'].items():
+            self.timings[name] = self.timings.get(name, 0) + seconds
+
+    def to_dict(self):
+        return {'counters': dict(self.counters), 'timings': dict(self.timings)}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def phase(stats, name):
+    """
+    Times the phase on the stats, or does nothing if there are no stats.
+    """
+    if stats is None:
+        return _NO_PHASE
+    return stats.phase(name)
@@ -0,0 +1,292 @@
+# python3
+# board_store.py - An SQLite store of generated boards (as BoardRecords), indexed by preset and total_diff,
+# so balanced boards can be handed out without generating them on the spot.
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from board_presets import preset_boards
+from board_random import make_rng
+from board_stream import BoardRecord, board_record
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS boards (
+    id INTEGER PRIMARY KEY,
+    preset TEXT NOT NULL,
+    total_diff REAL NOT NULL,
+    seed INTEGER,
+    board TEXT NOT NULL,
+    max_width INTEGER NOT NULL,
+    min_width INTEGER NOT NULL,
+    main_max_width INTEGER,
+    main_min_width INTEGER,
+    main_center INTEGER,
+    resources BLOB NOT NULL,
+    numbers BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS boards_by_balance ON boards (preset, total_diff);
+CREATE INDEX IF NOT EXISTS boards_by_preset ON boards (preset, id);
+"""
+
+_COLUMNS = 'total_diff, seed, board, max_width, min_width, main_max_width, main_min_width, main_center, resources, numbers'
+
+# The seeds the boards are generated from are unsigned 64 bit numbers, which SQLite can't hold as they are
+_SEED_RANGE = 1 << 64
+
+
+def _seed_column(seed):
+    if seed is not None and seed >= _SEED_RANGE >> 1:
+        return seed - _SEED_RANGE
+    return seed
+
+
+def _row(preset, record):
+    main_island = record.main_island or (None, None, None)
+    return (
+        preset, record.total_diff, _seed_column(record.seed), record.board, record.max_width, record.min_width,
+        *main_island, record.resources, record.numbers,
+    )
+
+
+def _record(row):
+    total_diff, seed, board, max_width, min_width, main_max_width, main_min_width, main_center, resources, numbers = row
+    if seed is not None and seed < 0:
+        seed += _SEED_RANGE
+    main_island = None if main_max_width is None else (main_max_width, main_min_width, bool(main_center))
+    return BoardRecord(total_diff, seed, board, max_width, min_width, main_island, bytes(resources), bytes(numbers))
+
+
+class BoardStore:
+    """
+    Keeps generated boards in an SQLite file, as the BoardRecords of board_stream
+    (the kind of board and its main island, a byte per tile for the resources and the numbers,
+    and the seed to build the board again),
+    under the name of the preset they were generated from.
+
+    The boards are indexed by preset and total_diff, so asking for a random board under a threshold
+    only looks at the boards of that preset under it:
+        store.random('five_six_player', threshold=3)   a board, left in the store
+        store.take('five_six_player', threshold=3)     boards, removed from the store so they're only handed out once
+    board_stream.board_from_record turns a record back into a board.
+
+    fill generates boards for a preset into the store, and keep_filled does it in the background
+    whenever taking boards leaves fewer than low of them (see Refill).
+    Every thread gets its own connection, so the store can be shared by threads (and by processes
+    through the same file).
+    """
+
+    def __init__(self, path, rng=None):
+        self.path = path
+        # Picks the random boards
+        self.rng, self.seed = make_rng(rng)
+        self._local = threading.local()
+        self._refills = {}
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Transactions are started explicitly (see _transaction)
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def add(self, preset, records):
+        """
+        Adds the records (or boards, which are turned into records) to the store under the preset name.
+        Returns how many were added.
+        """
+        rows = [
+            _row(preset, record if isinstance(record, BoardRecord) else board_record(record))
+            for record in records
+        ]
+        with self._transaction() as connection:
+            connection.executemany(
+                f'INSERT INTO boards (preset, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows,
+            )
+        return len(rows)
+
+    def fill(self, preset, count, threshold=None, **kwargs):
+        """
+        Generates count boards of the preset with a total_diff under the threshold into the store
+        (see board_stream.stream_boards for the other arguments). Returns how many were added.
+        """
+        records = preset_boards(preset, threshold=threshold, limit=count, records=True, **kwargs)
+        return self.add(preset, records)
+
+    def count(self, preset, threshold=None):
+        """
+        How many boards of the preset are in the store (only the ones with a total_diff under the threshold if given).
+        """
+        where, parameters = self._where(preset, threshold)
+        return self._connection().execute(f'SELECT COUNT(*) FROM boards WHERE {where}', parameters).fetchone()[0]
+
+    def _where(self, preset, threshold):
+        if threshold is None:
+            return 'preset = ?', (preset,)
+        return 'preset = ? AND total_diff < ?', (preset, threshold)
+
+    def _pick(self, connection, preset, threshold):
+        """
+        Returns (id, row) of a random board, or None if there are none.
+        A random id is picked between the first and the last board of the preset, and the first board
+        that matches from there on (going around to the start if there isn't one) is taken, walking the boards
+        of the preset in id order. So a pick only looks at the boards between the id and the one it finds,
+        instead of counting all the boards that match (boards after a run of ones that don't match
+        are picked a bit more often).
+        """
+        # Asked for one at a time, so each is a single lookup in the index
+        lowest = connection.execute('SELECT MIN(id) FROM boards WHERE preset = ?', (preset,)).fetchone()[0]
+        highest = connection.execute('SELECT MAX(id) FROM boards WHERE preset = ?', (preset,)).fetchone()[0]
+        if lowest is None:
+            return None
+        where, parameters = self._where(preset, threshold)
+        start = self.rng.randint(lowest, highest)
+        for condition in ('id >= ?', 'id < ?'):
+            row = connection.execute(
+                f'SELECT id, {_COLUMNS} FROM boards INDEXED BY boards_by_preset WHERE {where} AND {condition} '
+                'ORDER BY id LIMIT 1',
+                parameters + (start,),
+            ).fetchone()
+            if row is not None:
+                return row[0], row[1:]
+
+        return None
+
+    def random(self, preset, threshold=None):
+        """
+        Returns the record of a random board of the preset with a total_diff under the threshold
+        (left in the store), or None if there isn't one.
+        """
+        picked = self._pick(self._connection(), preset, threshold)
+        return None if picked is None else _record(picked[1])
+
+    def take(self, preset, threshold=None, count=1):
+        """
+        Removes up to count random boards of the preset with a total_diff under the threshold
+        from the store and returns their records (fewer if there aren't enough).
+        """
+        records = []
+        with self._transaction() as connection:
+            for i in range(count):
+                picked = self._pick(connection, preset, threshold)
+                if picked is None:
+                    break
+                connection.execute('DELETE FROM boards WHERE id = ?', (picked[0],))
+                records.append(_record(picked[1]))
+
+        refill = self._refills.get(preset)
+        if refill is not None:
+            refill.check()
+        return records
+
+    def keep_filled(self, preset, low, target, threshold=None, **kwargs):
+        """
+        Starts refilling the preset in the background (see Refill) and returns the Refill.
+        """
+        if preset in self._refills:
+            raise ValueError(f"{preset!r} is already being kept filled")
+        refill = Refill(self, preset, low, target, threshold, **kwargs)
+        self._refills[preset] = refill
+        refill.start()
+        return refill
+
+    def close(self):
+        """
+        Stops the background refills and closes this thread's connection.
+        """
+        for refill in self._refills.values():
+            refill.stop()
+        self._refills.clear()
+        self._close_connection()
+
+    def _close_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Refill(threading.Thread):
+    """
+    Keeps at least low boards of a preset with a total_diff under the threshold in a store:
+    whenever there are fewer (checked when it starts, whenever boards are taken, and every interval seconds)
+    it generates boards in batches of batch_size until there are target of them.
+    Every batch is generated from a seed of its own, drawn from seed (if one is given the batches are reproducible),
+    so no batch repeats the boards of another. Any other arguments are passed on to BoardStore.fill.
+    """
+
+    def __init__(self, store, preset, low, target, threshold=None, batch_size=16, interval=5, seed=None, **kwargs):
+        super().__init__(name=f'refill-{preset}', daemon=True)
+        self.store = store
+        self.preset = preset
+        self.low = low
+        self.target = target
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.interval = interval
+        self.kwargs = kwargs
+        self._seeds, self.seed = make_rng(seed)
+        self.generated = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def check(self):
+        """
+        Wakes the refill up to check how many boards are left.
+        """
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    def top_up(self):
+        """
+        Generates boards until there are target of them if there are fewer than low (the check the thread runs).
+        Returns how many boards were generated.
+        """
+        store = self.store
+        generated = 0
+        if store.count(self.preset, self.threshold) < self.low:
+            while not self._stopping.is_set():
+                missing = self.target - store.count(self.preset, self.threshold)
+                if missing <= 0:
+                    break
+                generated += store.fill(
+                    self.preset, min(missing, self.batch_size), self.threshold,
+                    seed=self._seeds.getrandbits(64), **self.kwargs,
+                )
+        self.generated += generated
+        return generated
+
+    def run(self):
+        try:
+            while not self._stopping.is_set():
+                self._wake.clear()
+                self.top_up()
+                self._wake.wait(self.interval)
+        finally:
+            self.store._close_connection()
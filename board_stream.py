@@ -0,0 +1,86 @@
+# python3
+# board_stream.py - Lazily streams boards (or compact records of them) built from a board spec.
+
+from collections import namedtuple
+
+from batch_generation import generate_boards
+from board_state import RESOURCES, number_name
+from board_serialization import board_type
+from catan_board import CatanIsland
+from seafarers_catan_board import SeafarerIslands
+
+
+# A board reduced to what is needed to score it, show it or build it again:
+# the kind of board ('catan' or 'seafarers'), the (max_width, min_width, center) of the main island
+# of seafarers boards (None for the others), and the resource and number codes of every tile (in tile order) as bytes.
+BoardRecord = namedtuple(
+    'BoardRecord', ['total_diff', 'seed', 'board', 'max_width', 'min_width', 'main_island', 'resources', 'numbers'],
+)
+
+
+def board_record(board, total_diff=None):
+    """
+    Returns the BoardRecord of a board.
+    """
+    if total_diff is None:
+        total_diff = board.total_diff
+    state = board.state
+    main_island = None
+    if isinstance(board, SeafarerIslands):
+        main_island = (*board.main_island_dimensions, bool(board.main_island_center))
+    return BoardRecord(
+        total_diff, board.seed, board_type(board), board.max_width, board.min_width, main_island,
+        bytes(state.resources), bytes(state.numbers),
+    )
+
+
+def board_from_record(record):
+    """
+    Builds the board a record was made from (without running any of the placement),
+    as the same kind of board it was made from.
+    """
+    resources = [RESOURCES[resource] for resource in record.resources]
+    numbers = [number_name(number) for number in record.numbers]
+    if record.board == 'seafarers':
+        main_max_width, main_min_width, main_center = record.main_island
+        board = SeafarerIslands.from_layout(
+            record.max_width, record.min_width, resources, numbers, (main_max_width, main_min_width), main_center,
+        )
+    else:
+        board = CatanIsland.from_layout(record.max_width, record.min_width, resources, numbers)
+    board.seed = record.seed
+
+    return board
+
+
+def stream_boards(spec, threshold=None, limit=None, tries=None, filters=(), records=False, seed=None, processes=1, **kwargs):
+    """
+    Lazily yields the boards built from the spec (a batch_generation.BoardSpec) that pass:
+        threshold: only boards with a total_diff under it
+        filters:   functions that take a board and return True to keep it
+
+    Stops once limit boards have been yielded or tries boards have been built
+    (it goes on forever if neither is given), and whenever the caller stops asking for boards.
+    With records=True a BoardRecord is yielded instead of each board.
+
+    The boards are built in this process by default, one at a time and in the order of their seeds,
+    so the same seed always gives the same stream. Any other arguments (processes, chunk_size, stats)
+    are passed on to generate_boards.
+    """
+    if limit is not None and limit <= 0:
+        return
+    if processes == 1:
+        # Only build the boards as they are asked for
+        kwargs.setdefault('chunk_size', 1)
+    boards = generate_boards(spec, tries, threshold, processes=processes, seed=seed, **kwargs)
+    yielded = 0
+    try:
+        for total_diff, board_seed, board in boards:
+            if not all(keep(board) for keep in filters):
+                continue
+            yield board_record(board, total_diff) if records else board
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                break
+    finally:
+        boards.close()
@@ -0,0 +1,193 @@
+# python3
+# board_svg.py - Draws boards as SVG (hexes, resource colors, number tokens and pips) with nothing but the standard library,
+# one board at a time or thousands at once into a directory or a single HTML file.
+
+import os
+from html import escape
+from math import sqrt
+
+from board_state import RESOURCES, NO_NUMBER, NUMBER_POINTS
+
+
+RESOURCE_COLORS = {
+    'Desert': '#e3d3a1',
+    'Sea': '#4a90c8',
+    'Brick': '#b5562d',
+    'Wood': '#2f7a32',
+    'Ore': '#8a8d91',
+    'Grain': '#e8c547',
+    'Sheep': '#9ccc65',
+    'Gold': '#d4af37',
+}
+
+# The numbers rolled the most are drawn in red, like on the real tokens
+_HOT_NUMBERS = (6, 8)
+
+# The shapes every board is drawn with, defined once per document and placed with <use>
+# (hex is centered on 0, 0 and size across from the center to a corner)
+_DEFS = (
+    '<defs>'
+    '<polygon id="hex" points="{hex}" stroke="#3b2f1e" stroke-width="{stroke}"/>'
+    '<circle id="token" r="{token}" fill="#f6ecd2" stroke="#3b2f1e" stroke-width="1"/>'
+    '<circle id="pip" r="{pip}"/>'
+    '</defs>'
+)
+
+# Where the tiles go for every shape and size of hex, so it is only worked out once:
+# (topology, size) -> (width, height, the x, y center of every tile)
+_layouts = {}
+
+# The defs and pip offsets of every size of hex
+_defs = {}
+_pip_offsets = {}
+
+
+def _layout(topology, size):
+    """
+    Works out where the tiles of the topology go with hexes of the given size (center to corner).
+    The hexes are pointy topped: a step of x on the grid (where neighbors in a row are two apart) is half a hex across,
+    and a step of y is three quarters of a hex down.
+    """
+    key = (topology, size)
+    layout = _layouts.get(key)
+    if layout is None:
+        half_width = sqrt(3) / 2 * size
+        centers = tuple(
+            (round((x + 1) * half_width, 2), round(y * 1.5 * size + size, 2)) for x, y in topology.coords
+        )
+        width = round((topology.horizontal + 1) * half_width, 2)
+        height = round((topology.vertical - 1) * 1.5 * size + 2 * size, 2)
+        layout = (width, height, centers)
+        _layouts[key] = layout
+
+    return layout
+
+
+def _size_defs(size):
+    defs = _defs.get(size)
+    if defs is None:
+        half_width = sqrt(3) / 2 * size
+        corners = ' '.join(
+            f'{round(dx, 2)},{round(dy, 2)}'
+            for dx, dy in ((0, -size), (half_width, -size / 2), (half_width, size / 2),
+                (0, size), (-half_width, size / 2), (-half_width, -size / 2))
+        )
+        defs = _DEFS.format(hex=corners, stroke=round(size / 20, 2), token=round(size * 0.42, 2), pip=round(size / 22, 2))
+        _defs[size] = defs
+
+    return defs
+
+
+def _pips(size):
+    """
+    The x offsets of the pips under the number of a token with each number of points.
+    """
+    pips = _pip_offsets.get(size)
+    if pips is None:
+        gap = size / 9
+        pips = [tuple(round((i - (points - 1) / 2) * gap, 2) for i in range(points)) for points in range(6)]
+        _pip_offsets[size] = pips
+
+    return pips
+
+
+def _tiles(board, size, centers, labels):
+    """
+    The SVG of the tiles of the board (without the <svg> around them).
+    """
+    state = board.state
+    positions = board.topology.positions
+    pips = _pips(size)
+    font = round(size * 0.36, 2)
+    label_font = round(size * 0.2, 2)
+    pip_y = round(size * 0.22, 2)
+    parts = []
+    for tile, (x, y) in enumerate(centers):
+        resource = RESOURCES[state.resources[tile]]
+        if resource is None:
+            continue
+        parts.append(f'<use href="#hex" x="{x}" y="{y}" fill="{RESOURCE_COLORS[resource]}"><title>{resource}</title></use>')
+        number = state.numbers[tile]
+        if number != NO_NUMBER:
+            color = '#c0262d' if number in _HOT_NUMBERS else '#222'
+            parts.append(
+                f'<use href="#token" x="{x}" y="{y}"/>'
+                f'<text x="{x}" y="{round(y + font * 0.3, 2)}" font-size="{font}" fill="{color}">{number}</text>'
+            )
+            parts.extend(
+                f'<use href="#pip" x="{round(x + dx, 2)}" y="{round(y + pip_y, 2)}" fill="{color}"/>'
+                for dx in pips[NUMBER_POINTS[number]]
+            )
+        if labels:
+            parts.append(
+                f'<text x="{x}" y="{round(y - size * 0.55, 2)}" font-size="{label_font}" fill="#1b1b1b">{positions[tile]}</text>'
+            )
+
+    return ''.join(parts)
+
+
+def _svg(board, size, labels, defs=True):
+    width, height, centers = _layout(board.topology, size)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" width="{width}" height="{height}" '
+        f'font-family="sans-serif" font-weight="bold" text-anchor="middle">'
+        + (_size_defs(size) if defs else '')
+        + _tiles(board, size, centers, labels)
+        + '</svg>'
+    )
+
+
+def render_svg(board, size=40, labels=False):
+    """
+    Returns a standalone SVG document of the board, with hexes size across from the center to a corner.
+    labels also shows the label of every tile (like 'C4').
+    """
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + _svg(board, size, labels) + '\n'
+
+
+def _caption(board):
+    return f'total_diff {board.total_diff:.2f}' + ('' if board.seed is None else f', seed {board.seed}')
+
+
+def write_svgs(boards, directory, prefix='board', size=40, labels=False):
+    """
+    Writes every board to its own SVG file in the directory (made if it isn't there),
+    named prefix-00001.svg and so on. Returns the paths of the files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, board in enumerate(boards, 1):
+        path = os.path.join(directory, f'{prefix}-{i:05d}.svg')
+        with open(path, 'w', encoding='utf-8') as svg_file:
+            svg_file.write(render_svg(board, size, labels))
+        paths.append(path)
+
+    return paths
+
+
+def write_html(boards, path, title='Boards', per_page=12, size=40, labels=False):
+    """
+    Writes every board into one HTML file, per_page boards to a page (pages break when printed),
+    each with its total_diff and seed under it. The shapes are defined once for the whole file
+    and the file is written as the boards come, so any number of boards can be written.
+    Returns how many boards were written.
+    """
+    written = 0
+    with open(path, 'w', encoding='utf-8') as html_file:
+        html_file.write(
+            f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{escape(title)}</title>'
+            '<style>body{font-family:sans-serif}section{display:flex;flex-wrap:wrap;gap:16px;break-after:page}'
+            'figure{margin:0}figcaption{text-align:center;font-size:12px}</style></head><body>\n'
+            f'<h1>{escape(title)}</h1>\n'
+            # The shapes are defined once for the whole file, in an svg of their own
+            f'<svg width="0" height="0" style="position:absolute">{_size_defs(size)}</svg>\n<section>\n'
+        )
+        for board in boards:
+            if written and written % per_page == 0:
+                html_file.write('</section>\n<section>\n')
+            svg = _svg(board, size, labels, defs=False)
+            html_file.write(f'<figure>{svg}<figcaption>{escape(_caption(board))}</figcaption></figure>\n')
+            written += 1
+        html_file.write('</section>\n</body></html>\n')
+
+    return written
@@ -1,69 +1,56 @@
 # python3
 # catan_board.py - Tile and Catan Board classes. Set up a balanced catan board given proper inputs.
 
-from string import ascii_uppercase
-from math import floor
-from random import randint, shuffle
+from time import perf_counter
 from collections import deque
 
 import unittest
 
+from board_errors import BoardGenerationError
+from board_feasibility import check_island
+from board_render import TextLayout, write_board
+from board_random import make_rng
+from board_stats import phase
+from board_state import (
+    BoardState, Tile, RESOURCES, EMPTY, DESERT, SEA, GOLD, NO_NUMBER, NUMBER_POINTS,
+    resource_code, number_code,
+)
+from cluster_index import ClusterIndex
+from hex_topology import get_topology
+from resource_solver import ResourceSolver
 
-class Tile:
+
+# The resources that count towards the balance of a board (everything but the dead tiles and gold)
+SCORED_RESOURCES = tuple(code for code in range(len(RESOURCES)) if code > SEA and code != GOLD)
+
+
+def balance_score(points_per_resource):
     """
-    Tile class from which the Catan Board is created.
-    This is a hexagonal tile, with the positional relationships defined as:
-    right, top_right, top_left, left, bottom_left, bottom_right
+    The total difference of each resource's points from the average points per resource.
+    (The lower the score the more balanced the board.)
     """
+    points = list(points_per_resource.values())
+    if len(points) == 0:
+        return 0
+    average_points = sum(points) / len(points)
+    total_diff = 0
+    for resource_points in points:
+        total_diff += abs(average_points - resource_points)
 
-    def __init__(self, x, y, position, number=None, point_value=0, resource=None):
-        # Positional inputs:
-        self.x = x
-        self.y = y
-        self.pos = position
-
-        # Catan Inputs
-        self.number = number
-        self.points = point_value
-        self.resource = resource
-
-
-        # positional relationships
-        self.right = None
-        self.top_right = None
-        self.top_left = None
-        self.left = None
-        self.bottom_left = None
-        self.bottom_right = None
-
-        # Create a list of possible adjacent positions
-        self.possible_adjacents = self._check_possible_adjacents()
-
-    def _check_possible_adjacents(self):
-        possible_options = []
-        check_options = [
-            self.right, 
-            self.top_right, 
-            self.top_left, 
-            self.left, 
-            self.bottom_left, 
-            self.bottom_right, 
-        ]
-        for option in check_options:
-            if option !=None:
-                possible_options.append(option)
-
-        return possible_options
+    return total_diff
 
 
 class CatanIsland:
     """
     Creates the Island of Catan using the tile class.
     """
+
+    # How the island is drawn as text (see board_render)
+    text_layout = TextLayout(line='___', resource_width=1, number_blank='  ')
     
-    def __init__(self, max_width, min_width, resource_dict, numbers_dict, desert_center=True, adj_resource_limit=2):
+    def __init__(self, max_width, min_width, resource_dict, numbers_dict, desert_center=True, adj_resource_limit=2,
+            number_attempts=200, time_budget=None, rng=None, stats=None):
         # Constants
-        self.letters = list(ascii_uppercase)
         self.num_to_points = {
             '2': 1, 
             '3': 2, 
@@ -94,9 +81,6 @@ class CatanIsland:
             ]
         
         # Tile Information:
-        self.position_dict = {}
-        self.tiles_by_resource = {}
-        self.total_points_per_resource = {}
         self.resource_numbers = {}
         self.resource_points = {}
         self.resources_dict = resource_dict
@@ -109,168 +93,129 @@ class CatanIsland:
         self.numbers = numbers_dict
 
         # Reference variables
-        self.diff = self.max_width - self.min_width
-        self.vertical = (self.diff * 2) + 1
-        self.horizontal = self.max_width + (self.max_width - 1)
+        self.topology = get_topology(max_width, min_width)
+        self.diff = self.topology.diff
+        self.vertical = self.topology.vertical
+        self.horizontal = self.topology.horizontal
         self.dead_tiles = ['Desert', 'Sea', None]
 
+        # Generation budget
+        if number_attempts < 1:
+            raise ValueError(f"number_attempts must be at least 1, not {number_attempts}")
+        self.number_attempts = number_attempts
+        self.deadline = None if time_budget is None else perf_counter() + time_budget
+
+        # All the randomness comes from this board's own generator,
+        # so the same inputs and seed always give the same board (as long as the time budget isn't hit)
+        self.rng, self.seed = make_rng(rng)
+        # Optional BoardStats to record the retries and phase timings into
+        self.stats = stats
+
+        # Fail straight away on inputs no board can ever be made from
+        if resource_dict != {} or numbers_dict != {}:
+            check_island(max_width, min_width, resource_dict, numbers_dict, desert_center, adj_resource_limit)
+
         # Create the island:
-        self.island = self._create_island()
+        with phase(stats, 'grid'):
+            self.state = self._create_island()
+        self._position_dict = None
         # For testing:
         if resource_dict != {}:
-            self._place_resources(resource_dict, desert_center, adj_resource_limit)
+            with phase(stats, 'resources'):
+                self._place_resources(resource_dict, desert_center, adj_resource_limit)
+                self.state.count_resources()
         if numbers_dict != {}:
-            self._place_numbers_by_resource(numbers_dict)
+            with phase(stats, 'numbers'):
+                self._place_numbers_by_resource(numbers_dict)
+        if stats is not None:
+            stats.count('boards')
 
 
-    def _create_grid(self, max_width, min_width):
+    @classmethod
+    def from_layout(cls, max_width, min_width, resources, numbers):
         """
-        Creates the grid based on the max and min width supplied
+        Creates an island with the given resource and number on each tile (in tile order)
+        without running any of the placement.
         """
-        letters = self.letters
-        grid = []
-        diff = max_width - min_width
-        vertical = self.vertical
-        horizontal = max_width + (max_width - 1)
-        for y in range(vertical):
-            row = []
-            for x in range(0, horizontal, 1):
-                pos = f'{letters[y]}{x}'
-                tile = Tile(x, y, pos)
-                row.append(tile)    
-            grid.append(row)
-                 
+        board = cls(max_width, min_width, {}, {})
+        state = board.state
+        for tile, (resource, number) in enumerate(zip(resources, numbers)):
+            state.set_resource(tile, resource_code(resource))
+            state.set_number(tile, number_code(number))
 
-        return grid
+        return board
 
     def _create_island(self):
         """
-        Creates a balanced catan board setup and ready for playing.
-        """
-        grid = self._create_grid(self.max_width, self.min_width)
-        max_width = self.max_width
-        min_width = self.min_width
-
-        diff = max_width - min_width
-        vertical = self.vertical
-        horizontal = max_width + (max_width - 1)
-        offset = diff
-        horizontal = self.max_width + (self.max_width - 1)
-        middle = floor(len(grid) / 2)
-        for y in range(len(grid)):
-            # Create the board offsets 
-            # Since the island is a hexagon
-            if y <= diff and y != 0:
-                offset -= 1
-            elif y > diff:
-                offset += 1
-            for x in range(offset, horizontal - offset, 2):
-
-                tile = grid[y][x]
-
-                # Top of the board: 
-                if y == 0:
-                    # All top tiles have these relationships
-                    tile.bottom_right = grid[y + 1][x + 1]
-                    tile.bottom_left = grid[y + 1][x - 1]
-                    # In the unlikely event that the minimum width is 1
-                    if min_width == 1:
-                        pass
-                    # Top of the board on the left corner
-                    elif x == middle - y:
-                        tile.right = grid[y][x + 2]
-                    # Top of the board on the right corner
-                    elif x == (horizontal - 1) - middle + y: 
-                        tile.left = grid[y][x - 2]
-                    else:
-                        tile.right = grid[y][x + 2]
-                        tile.left = grid[y][x - 2]
-                
-                # Left and right middle edges
-                elif y == middle and (x == 0 or x == horizontal - 1):
-                    if x == 0:
-                        tile.right = grid[y][x + 2]
-                        tile.top_right = grid[y - 1][x + 1]
-                        tile.bottom_right = grid[y + 1][x + 1]
-                    if x == horizontal - 1:
-                        tile.left = grid[y][x - 2]
-                        tile.top_left = grid[y - 1][x - 1]
-                        tile.bottom_left = grid[y + 1][x - 1]
-
-                # Bottom of the board
-                elif y == len(grid) - 1:
-                    # All bottom tiles have these relationships
-                    tile.top_right = grid[y - 1][x + 1]
-                    tile.top_left = grid[y - 1][x - 1]
-                    if min_width == 1:
-                        pass
-                    # Left corner on the bottom of the board
-                    elif x == abs(middle - y):
-                        tile.right = grid[y][x + 2]
-                    # Right corner on the bottom of the board
-                    elif x == (horizontal - 1) + middle - y:
-                        tile.left = grid[y][x - 2]
-                    else:
-                        tile.left = grid[y][x - 2]
-                        tile.right = grid[y][x + 2]
-                
-                # Left edge of the board above middle
-                elif x == middle - y:
-                    tile.right = grid[y][x + 2]
-                    tile.top_right = grid[y - 1][x + 1]
-                    tile.bottom_right = grid[y + 1][x + 1]
-                    tile.bottom_left = grid[y + 1][x - 1]
-
-                # Left edge of the board below middle
-                elif x == abs(middle - y):
-                    tile.right = grid[y][x + 2]
-                    tile.top_right = grid[y - 1][x + 1]
-                    tile.bottom_right = grid[y + 1][x + 1]
-                    tile.top_left = grid[y - 1][x - 1]
-
-                # Right edge of the board above middle
-                elif x == (horizontal - 1) - middle + y: # Subtract 1 to get the number of tiles at the middle
-                    tile.left = grid[y][x - 2]
-                    tile.top_left = grid[y - 1][x - 1]
-                    tile.bottom_left = grid[y + 1][x - 1]
-                    tile.bottom_right = grid[y + 1][x + 1]
-
-                # Right edge of the board below middle
-                elif x == (horizontal - 1) + middle - y:
-                    tile.left = grid[y][x - 2]
-                    tile.top_left = grid[y - 1][x - 1]
-                    tile.bottom_left = grid[y + 1][x - 1]
-                    tile.top_right = grid[y - 1][x + 1]
-
-                # All center tiles
-                else:
-                    tile.right = grid[y][x + 2]
-                    tile.top_right = grid[y - 1][x + 1]
-                    tile.bottom_right = grid[y + 1][x + 1]
-                    tile.left = grid[y][x - 2]
-                    tile.top_left = grid[y - 1][x - 1]
-                    tile.bottom_left = grid[y + 1][x - 1]
+        Creates the (empty) state of the island.
+        The geometry comes from the cached topology for this island shape,
+        so the only thing built per board are the resource, number and point arrays.
+        """
+        return BoardState(self.topology)
 
-                tile.possible_adjacents = tile._check_possible_adjacents()
-                self.position_dict[tile.pos] = tile
+    @property
+    def island(self):
+        """
+        The tiles laid out on the grid, with None for the cells outside of the island.
+        """
+        grid = [[None] * self.horizontal for y in range(self.vertical)]
+        for tile in self.state.tiles():
+            grid[tile.y][tile.x] = tile
 
         return grid
 
-    def _check_adjacents(self, tile, num_adj, resource, checked=None):
+    @property
+    def position_dict(self):
+        if self._position_dict is None:
+            self._position_dict = dict(zip(self.topology.positions, self.state.tiles()))
+        return self._position_dict
+
+    @property
+    def tiles_by_resource(self):
+        return self._tiles_by_resource(range(self.topology.size))
+
+    def _tiles_by_resource(self, indices):
         """
-        Checks for adjacent tiles of the same resource type as the 
-        given resource type
+        Groups the tiles at the given indices by their resource, leaving out the dead tiles.
         """
-        for adj in tile.possible_adjacents:
-            if adj.resource == resource:
-                if adj not in checked:
-                    num_adj += 1
-                    checked.append(adj)
-                    self._check_adjacents(adj, num_adj, resource, checked)
+        tiles = self.state.tiles()
+        tiles_by_resource = {}
+        for resource, indices in self._indices_by_resource(indices).items():
+            tiles_by_resource[RESOURCES[resource]] = [tiles[i] for i in indices]
 
-        return num_adj
-    
-    def _place_resources(self, resources_dict, desert_center=True, adj_resource_limit=2, dead_tiles=['Desert', 'Sea']):
+        return tiles_by_resource
+
+    def _indices_by_resource(self, indices):
+        """
+        Groups the given tile indices by their resource code, leaving out the dead tiles.
+        """
+        resources = self.state.resources
+        indices_by_resource = {}
+        for i in indices:
+            resource = resources[i]
+            if resource <= SEA:
+                continue
+            if resource not in indices_by_resource:
+                indices_by_resource[resource] = [i]
+            else:
+                indices_by_resource[resource].append(i)
+
+        return indices_by_resource
+
+    def _take_resource(self, resources_dict, resource, resources=None):
+        """
+        Uses up one of the given resource (by code).
+        Once a resource is all used up it is removed from the dictionary
+        (and the list of resources to choose from, if one is given).
+        """
+        if resource in resources_dict:
+            resources_dict[resource] -= 1
+            if resources_dict[resource] == 0:
+                resources_dict.pop(resource)
+                if resources is not None and resource in resources:
+                    resources.remove(resource)
+
+    def _place_resources(self, resources_dict, desert_center=True, adj_resource_limit=2):
         """
         Places the resources in a balanced manner on the board
         given a dictionary containing the amount of each resource.
@@ -278,104 +223,32 @@ class CatanIsland:
         Rules for a balanced board (from a resource perspective):
         - No more than two resouces of the same kind next to one another.
         This includes strings of resources.
+
+        The deserts are placed first, the rest of the tiles are filled in by the ResourceSolver.
         """
-        ADJ_RESOURCE_LIMIT = adj_resource_limit
+        tile_resources = self.state.resources
 
-        resources = [resource for resource in resources_dict.keys()]
+        # Work with the resource codes from here on
+        resources_dict = {resource_code(resource): quantity for resource, quantity in resources_dict.items() if quantity > 0}
 
         # Place desert in the center of the island unless otherwise specified
         if desert_center == True:
-            vert = floor(self.vertical / 2)
-            letter = self.letters[vert]
-            horz = floor(self.horizontal / 2)
-            pos = f"{letter}{horz}"
-            # Check to see if the position is in the position dictionary
-            # If it is not add 1 or subtract one until all the desert tiles are gone
-            i = 0
-            while 'Desert' in resources_dict:
-                if i % 2 == 0:
-                    horz += 1
-                else:
-                    horz -= 2
-                pos = f"{letter}{horz}"
-                if pos in self.position_dict:
-                    tile = self.position_dict[pos]
-                    if tile.resource == None:
-                        tile.resource = 'Desert'
-                        if tile.resource in resources_dict:
-                            resources_dict[tile.resource] -= 1
-                            if resources_dict[tile.resource] == 0:
-                                resources_dict.pop(tile.resource)
-                                resources.remove(tile.resource)
-                i += 1 
-
-        tiles = [tile for tile in self.position_dict.values()]
-        tiles_queue = deque(tiles)   
-
-        while len(tiles_queue) > 0:
-
-            tile = tiles_queue.popleft()
-            count = 0
-            adj_count = 0
-            while tile.resource == None:
-
-                if count > 3:
-                    tiles_queue.append(tile)
+            # The topology knows the order of the tiles outwards from the center
+            for tile in self.topology.center_order:
+                if DESERT not in resources_dict:
                     break
-                count += 1
-                
-                # Randomly select a resource from the list
-                resource_indx = randint(0, len(resources) - 1)
-                resource = resources[resource_indx]
-
-                # Find our how many of that resource is already adjacent
-                num_adj = 0
-                checked = []
-                for adj in tile.possible_adjacents:
-                    if adj.resource == resource:
-                        if adj not in checked:
-                            num_adj += 1
-                            checked.append(adj)
-                            # Check that adj tiles to see if it also has 
-                            # An adjacent resource of the same type
-                            num_adj = self._check_adjacents(adj, num_adj, resource, checked)
-                        
-                # If the check is met then decrease the number of that resource by one
-                if num_adj < ADJ_RESOURCE_LIMIT:
-                    tile.resource = resource
-                    
-                    # TODO: Find out why other resources are being added to the 
-                    # different resources
-                    # i.e. grain in sheep and vice versa. 
-                    # WHYYYYYYYYYYY????????? WTH!
-
-                    # Add the tile to the tiles by resource dictionary
-                    if tile.resource != None and resource not in dead_tiles and tile.resource not in dead_tiles:
-                        if resource not in self.tiles_by_resource:
-                            self.tiles_by_resource[resource] = [tile]
-                        else:
-                            if tile not in self.tiles_by_resource[resource] and tile.resource == resource:
-                                self.tiles_by_resource[resource].append(tile)
-
-                    resources_dict[resource] -= 1
-                    if resources_dict[resource] == 0:
-                        resources_dict.pop(resource)
-                        resources.pop(resource_indx)
-
-                elif adj_count > 2:
-                    for adj in tile.possible_adjacents:
-                        # This prevents desert from being moved from the center
-                        if adj.resource != 'Desert':
-                            if adj.resource not in resources_dict:
-                                resources_dict[adj.resource] = 1
-                                resources.append(adj.resource)
-                            else:
-                                resources_dict[adj.resource] += 1
-                            adj.resource = None
-                            tiles_queue.append(adj)
-
-                else:
-                    adj_count += 1
+                if tile_resources[tile] == EMPTY:
+                    tile_resources[tile] = DESERT
+                    self._take_resource(resources_dict, DESERT)
+
+        tiles = [tile for tile in range(self.topology.size) if tile_resources[tile] == EMPTY]
+        solver = ResourceSolver(self.topology, tile_resources, adj_resource_limit, self.rng)
+        try:
+            solver.solve(tiles, resources_dict)
+        finally:
+            if self.stats is not None:
+                self.stats.count('resource_backtracks', solver.total_backtracks)
+                self.stats.count('resource_restarts', solver.restarts)
 
     def _check_adjacent_tiles(self, tile, number):
         """
@@ -383,41 +256,42 @@ class CatanIsland:
         to check if any of the surrounding numbers are the same. 
         Or if 5 or 1 point tiles are adjacent to one another
         """
-        points = self.num_to_points[number]
+        numbers = self.state.numbers
+        tile_points = self.state.points
+        points = NUMBER_POINTS[number]
 
-        for adj in tile.possible_adjacents:
+        for adj in self.topology.adjacents[tile]:
             # If any of the adjacent numbers have the same number, 
             # return False
-            if adj.number == number:
+            if numbers[adj] == number:
                 return False
 
             if points == 5 or points == 1:
-                if adj.points == points:
+                if tile_points[adj] == points:
                     return False
         
         return True
 
-    def _check_three_tile_sum(self, points, adj_1, adj_2):
+    def _check_three_tile_sum(self, vertex, tile, adj_1, adj_2):
         """
-        Checks the adjacent tiles around the proposed tile
+        Checks the three tiles around an intersection (vertex) of the proposed tile
         and sums the points for all three tiles.
         If the sum is greater than a certain threshold; 12,
         or less than 4, return False
         Otherwise return True
         """
-        if adj_1.number == None or adj_2.number == None:
+        numbers = self.state.numbers
+        tile_points = self.state.points
+        points = tile_points[tile]
+        if numbers[adj_1] == NO_NUMBER or numbers[adj_2] == NO_NUMBER:
             if points >= 2:
                 return True
-            elif adj_1.points > 2 or adj_2.points > 2:
+            elif tile_points[adj_1] > 2 or tile_points[adj_2] > 2:
                 return True
             else:
                 return False
-        three_tile_sum = 0
-        three_tile_sum += points
-        # Check if the adj tile is None, 
-        # Otherwise it will throw an error
-        three_tile_sum += adj_1.points
-        three_tile_sum += adj_2.points
+        # The board keeps the sum of the points around every intersection
+        three_tile_sum = self.state.vertex_points[vertex]
         
         # Check if three tile sum is greater than 12 or
         # less than 4
@@ -425,23 +299,153 @@ class CatanIsland:
             return False
         return True
 
-    def _reset_tile_numbers(self, tiles, numbers_dict, numbers_queue):
+    def _reset_tile_numbers(self, tiles):
         """
         Resets the tiles back to before numbers were placed
         """
+        self.state.clear_numbers(tiles)
+
+    def _three_tile_checks(self, tiles):
+        """
+        Lists the three tile sum checks for the given tiles, and for every tile the checks it is part of.
+        There is a check for every intersection of three tiles (see VertexGraph) that one of the given tiles is on,
+        as (vertex, members, sides): the given tiles on the intersection, and the sum is checked from the side
+        of each of them as (tile, adj_1, adj_2).
+        """
+        graph = self.topology.graph
+        tile_set = set(tiles)
+        checks = []
+        checks_by_tile = {tile: [] for tile in tiles}
+        seen = set()
         for tile in tiles:
-            if tile.number != None:
-                if tile.number not in numbers_queue:
-                    numbers_queue.append(tile.number)
-                if tile.number not in numbers_dict:
-                    numbers_dict[tile.number] = 1
-                else:
-                    numbers_dict[tile.number] += 1
+            for vertex in graph.tile_vertices[tile]:
+                corner_tiles = graph.vertex_tiles[vertex]
+                if len(corner_tiles) < 3 or vertex in seen:
+                    continue
+                seen.add(vertex)
+                # Only the tiles that are getting numbers need to have one
+                # before the check can be made
+                members = tuple(member for member in corner_tiles if member in tile_set)
+                sides = []
+                for member in members:
+                    adj_1, adj_2 = (other for other in corner_tiles if other != member)
+                    sides.append((member, adj_1, adj_2))
+                check = (vertex, members, tuple(sides))
+                checks.append(check)
+                for member in members:
+                    checks_by_tile[member].append(check)
+
+        return checks, checks_by_tile
+
+    def _passes_three_tile_sum(self, checks):
+        for vertex, members, sides in checks:
+            for tile, adj_1, adj_2 in sides:
+                if self._check_three_tile_sum(vertex, tile, adj_1, adj_2) == False:
+                    return False
 
-            tile.number = None
-            tile.points = 0
+        return True
 
-        return numbers_dict, numbers_queue
+    def _try_number(self, tile, number, checks_by_tile):
+        """
+        Places the number on the tile if it passes every three tile sum check
+        that can be made now that the tile has a number.
+        """
+        state = self.state
+        numbers = state.numbers
+        state.set_number(tile, number)
+        for vertex, members, sides in checks_by_tile[tile]:
+            if all(numbers[member] != NO_NUMBER for member in members):
+                for check_tile, adj_1, adj_2 in sides:
+                    if self._check_three_tile_sum(vertex, check_tile, adj_1, adj_2) == False:
+                        state.set_number(tile, NO_NUMBER)
+                        return False
+
+        return True
+
+    def _out_of_time(self):
+        return self.deadline is not None and perf_counter() > self.deadline
+
+    def _place_numbers(self, tiles, numbers_dict, number_order, check_tile, steps_per_attempt, shuffle_order=False):
+        """
+        Places the numbers on the given tiles.
+        Goes through the resources in turn, keeping each number until that number is used up,
+        and places it on a random tile of the resource that passes check_tile.
+
+        The three tile sum check is made as soon as all the tiles in it have numbers,
+        so a partial board that can never pass is cut off straight away.
+        If the numbers are not all placed within steps_per_attempt the numbers are cleared
+        and the placement starts over, up to number_attempts times (or until the time budget is used up),
+        after which a BoardGenerationError is raised.
+        """
+        state = self.state
+        numbers_dict = {number_code(number): quantity for number, quantity in numbers_dict.items() if quantity > 0}
+        number_order = [number_code(number) for number in number_order]
+        tiles_by_resource = self._indices_by_resource(tiles)
+        resources = list(tiles_by_resource.keys())
+        checks, checks_by_tile = self._three_tile_checks(tiles)
+        three_tile_rejections = 0
+
+        for attempt in range(self.number_attempts):
+            if self._out_of_time():
+                break
+
+            remaining = dict(numbers_dict)
+            # Shuffle the resources and numbers so as not to run into the same placing order problem
+            if shuffle_order == True:
+                self.rng.shuffle(resources)
+                n_shuff = self.rng.randint(0, len(number_order) - 1)
+                number_order = number_order[n_shuff:] + number_order[:n_shuff]
+            resources_queue = deque(resources)
+            numbers_queue = deque(number for number in number_order if number in remaining)
+            placed = 0
+
+            for step in range(steps_per_attempt):
+                # Stop once all the numbers are used up (or all the tiles have numbers)
+                if len(numbers_queue) == 0 or placed == len(tiles):
+                    break
+
+                # Go through the resources and keep the number until that number is used up
+                number = numbers_queue.popleft()
+                resource = resources_queue.popleft()
+
+                candidates = list(tiles_by_resource[resource])
+                self.rng.shuffle(candidates)
+                for tile in candidates:
+                    if state.numbers[tile] == NO_NUMBER and check_tile(tile, number):
+                        if self._try_number(tile, number, checks_by_tile):
+                            placed += 1
+                            remaining[number] -= 1
+                            if remaining[number] == 0:
+                                remaining.pop(number)
+                            break
+                        three_tile_rejections += 1
+
+                if number in remaining:
+                    numbers_queue.appendleft(number)
+                resources_queue.append(resource)
+
+            # Checks all the tiles to make sure all the tiles meet the three tile sum check
+            finished = len(numbers_queue) == 0 or placed == len(tiles)
+            if finished and self._passes_three_tile_sum(checks):
+                if self.stats is not None:
+                    self._count_number_attempts(attempt + 1, three_tile_rejections)
+                return
+
+            # Otherwise remove all the number and points from the tiles and start over
+            self._reset_tile_numbers(tiles)
+
+        if self.stats is not None:
+            self._count_number_attempts(attempt + 1, three_tile_rejections)
+            self.stats.count('number_failures')
+        raise BoardGenerationError(
+            f"Could not place the numbers on {len(tiles)} tiles "
+            f"after {attempt + 1} attempts"
+        )
+
+    def _count_number_attempts(self, attempts, three_tile_rejections):
+        self.stats.count('number_attempts', attempts)
+        self.stats.count('number_resets', attempts - 1)
+        self.stats.count('three_tile_rejections', three_tile_rejections)
 
     def _place_numbers_by_resource(self, numbers_dict, dead_tiles=['Desert', 'Sea']):
         """
@@ -450,117 +454,22 @@ class CatanIsland:
         Randomize which order the resources are chosen in to make 
         so that the board isn't the same everytime.
         """
-        # Create a list and then a queue of resources to go through until all the resources
-        # Have number tokens on them.
-        all_tiles = [tile for tile in self.position_dict.values() if tile.resource not in dead_tiles]
-        resources = [resource for resource in self.tiles_by_resource.keys() if resource not in dead_tiles]
-        resources_queue = deque(resources)
-        numbers_queue = deque(self.number_placement_order)
-        
-        count = 0
+        dead_codes = [resource_code(resource) for resource in dead_tiles]
+        all_tiles = [tile for tile in range(self.topology.size) if self.state.resources[tile] not in dead_codes]
 
-        while len(numbers_queue) != 0:
-
-            count += 1  
-            # Once the count reaches a certian threshold,
-            # remove all the number and points from the tiles
-            if count >= 100:
-                numbers_dict, numbers_queue = self._reset_tile_numbers(all_tiles, numbers_dict, numbers_queue)
-                count = 0
-                
-            # Go through the resources and keep the number until that number is used up
-            number = numbers_queue.popleft()
-            points = self.num_to_points[number]
-            resource = resources_queue.popleft()
-
-            tiles = [tile for tile in reversed(self.tiles_by_resource[resource]) if tile.resource == resource]
-            
-            shuffle(tiles)
-            for tile in tiles:
-    
-                if tile.number == None:
-                    check_adjacents = self._check_adjacent_tiles(tile, number)
-                    if check_adjacents == True:
-                        tile.number = number
-                        tile.points = points
-
-                        numbers_dict[number] -= 1
-                        if numbers_dict[number] == 0:
-                            numbers_dict.pop(number)
-                        else:
-                            numbers_queue.appendleft(number)   
-                        break
-
-            if number in numbers_dict and number not in numbers_queue:
-                numbers_queue.appendleft(number) 
-            resources_queue.append(resource)
-
-        # Checks all the tiles to make sure all the tiles meet the three tile sum check
-        # If even one tile fails the board is re-generated.
-        for tile in all_tiles:
-
-            prev = None
-            for adj in tile.possible_adjacents:
-                # Checks three tiles at a time
-                # so this skips the first iteration
-                # which would only check two tiles
-                if prev != None:
-                    three_tile_sum_check = self._check_three_tile_sum(tile.points, adj, prev)
-                    if three_tile_sum_check == False:
-                        break
-                prev = adj
-            # If one of the tile checks is False 
-            # start over from scratch
-            if three_tile_sum_check == False:
-                numbers_dict, numbers_queue = self._reset_tile_numbers(all_tiles, numbers_dict, numbers_queue)
-                self._place_numbers_by_resource(numbers_dict)
+        self._place_numbers(all_tiles, numbers_dict, self.number_placement_order, self._check_adjacent_tiles, 100)
 
     def print_resources(self):
         """
         Prints where the resources are on the island.
         """
-
-        island = self.island
-
-        horizontal_line_segment = '___'
-        horizontal_line = horizontal_line_segment * self.horizontal
-        print()
-
-        for y in range(len(island)):
-            for x in range(len(island[0])):
-                tile = island[y][x]
-                if tile.resource != None:
-                    print(f'| {tile.resource[0]} |', end='')
-                else:
-                    print(f'  ', end='')
-            
-            print(f'\n{horizontal_line}')
-
+        write_board(self, style='resources')
 
     def print_numbers(self):
         """
         Prints where the numbers are on the island.
         """
-
-        island = self.island
-
-        horizontal_line_segment = '___'
-        horizontal_line = horizontal_line_segment * self.horizontal
-        print()
-        for resource, point_list in self.resource_points.items():
-            print(f"{resource}: {sum(point_list)}", end=' ')
-        print()
-
-        for y in range(len(island)):
-            for x in range(len(island[0])):
-                tile = island[y][x]
-                if tile.number != None:
-                    print(f'| {tile.number} |', end='')
-                else:
-                    print(f'  ', end='')
-            
-            print(f'\n{horizontal_line}')
-
+        write_board(self, style='numbers')
 
     def print_resources_by_tile(self):
 
@@ -574,25 +483,36 @@ class CatanIsland:
         """
         Prints the position of all the tiles
         """
-        tiles = [tile for tile in self.position_dict.values()]
+        tiles = [tile for tile in self.state.tiles()]
         return tiles
 
+    @property
+    def total_points_per_resource(self):
+        """
+        How many points are allocated to each resource on the board.
+        The totals are kept up to date by the board state as numbers are placed and reset,
+        so this never has to look at the tiles.
+        """
+        resource_tiles = self.state.resource_tiles
+        resource_points = self.state.resource_points
+        return {
+            RESOURCES[resource]: resource_points[resource]
+            for resource in SCORED_RESOURCES if resource_tiles[resource] > 0
+        }
+
+    @property
+    def total_diff(self):
+        """
+        The total difference of each resource's points from the average points per resource.
+        """
+        return balance_score(self.total_points_per_resource)
+
     def calculate_points_per_resource(self):
         """
         Calculates how many points are allocated to each resource.
         (For determining how balanced the board is.)
         """
-        tiles = [tile for tile in self.position_dict.values() if tile.resource not in self.dead_tiles and tile.resource != 'Gold']
-        tppr = self.total_points_per_resource
-        for tile in tiles:
-
-            # Add up the total points to see how balanced the board is
-            if tile.resource in tppr:
-                tppr[tile.resource] += tile.points
-            else:
-                tppr[tile.resource] = tile.points
-
-        return tppr
+        return self.total_points_per_resource
 
 
 class Test(unittest.TestCase):
@@ -713,6 +633,10 @@ class Test(unittest.TestCase):
         (2, 1, really_small_island_test),
     ]
 
+    # The resources and numbers of the base game
+    base_resources = {'Brick': 3, 'Wood': 4, 'Ore': 3, 'Grain': 4, 'Sheep': 4, 'Desert': 1}
+    base_numbers = {'2': 1, '3': 2, '4': 2, '5': 2, '6': 2, '8': 2, '9': 2, '10': 2, '11': 2, '12': 1}
+
     def generate_catan_board(self, max_width, min_width):
         catan_island = CatanIsland(max_width, min_width, {}, {})
         actual_tiles = catan_island.tiles()
@@ -759,6 +683,459 @@ class Test(unittest.TestCase):
                 else:
                     assert actual.bottom_right == bottom_right
 
+    def test_resource_cluster_limit(self):
+        # No more than adj_resource_limit tiles of the same resource are ever connected
+        for adj_resource_limit in (1, 2):
+            for x in range(20):
+                catan_island = CatanIsland(5, 3, self.base_resources, {}, True, adj_resource_limit)
+                clusters = ClusterIndex(catan_island.topology, catan_island.state.resources)
+                for tile in range(catan_island.topology.size):
+                    assert catan_island.state.resources[tile] != EMPTY
+                    assert clusters.size(tile) <= adj_resource_limit
+
+    def test_number_placement(self):
+        for x in range(20):
+            catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2)
+            tiles = [tile for tile in catan_island.tiles() if tile.resource != 'Desert']
+            assert all(tile.number != None for tile in tiles)
+            for tile in tiles:
+                for adj in tile.possible_adjacents:
+                    assert adj.number != tile.number
+            checks, checks_by_tile = catan_island._three_tile_checks([tile.index for tile in tiles])
+            assert catan_island._passes_three_tile_sum(checks)
+
+    def test_number_placement_budget(self):
+        # The two 5s have to go on the two tiles apart from each other, which puts 13 points
+        # around both intersections (only up to 12 are allowed)
+        resources = {'Brick': 2, 'Wood': 2}
+        with self.assertRaises(BoardGenerationError):
+            CatanIsland(2, 1, resources, {'5': 2, '6': 1, '9': 1}, False, 2, number_attempts=5)
+        with self.assertRaises(ValueError):
+            CatanIsland(2, 1, resources, {'5': 2, '6': 1, '9': 1}, False, 2, number_attempts=0)
+
+    def test_points_per_resource(self):
+        catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2)
+        expected = {}
+        for tile in catan_island.tiles():
+            if tile.resource != 'Desert':
+                expected[tile.resource] = expected.get(tile.resource, 0) + tile.points
+        # Calling it again doesn't add the points again
+        assert catan_island.calculate_points_per_resource() == expected
+        assert catan_island.calculate_points_per_resource() == expected
+        self.assertAlmostEqual(catan_island.total_diff, balance_score(expected))
+
+        # The totals follow the numbers as they are reset
+        tiles = [tile.index for tile in catan_island.tiles() if tile.resource == 'Ore']
+        catan_island._reset_tile_numbers(tiles)
+        expected['Ore'] = 0
+        assert catan_island.calculate_points_per_resource() == expected
+
+        # The points of each seafarers island follow the numbers the same way
+        from board_presets import preset_boards
+        board = next(preset_boards('seafarers_4_3_main_island_center', seed=1))
+
+        def recount(indices):
+            totals = {}
+            for tile in board.state.tiles():
+                if tile.index in indices and tile.resource not in board.dead_tiles + ['Gold']:
+                    totals[tile.resource] = totals.get(tile.resource, 0) + tile.points
+            return totals
+
+        for reset in ([], board.small_islands_indices[:3], board.main_island_indices):
+            board._reset_tile_numbers(reset)
+            assert board.points_per_island == {
+                'main': recount(set(board.main_island_indices)), 'small': recount(set(board.small_islands_indices)),
+            }
+
+    def test_seeded_boards(self):
+        for seed in range(10):
+            catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2, rng=seed)
+            again = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2, rng=catan_island.seed)
+            assert catan_island.state.resources == again.state.resources
+            assert catan_island.state.numbers == again.state.numbers
+        # Boards without a seed still get one they can be generated again from
+        catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2)
+        again = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2, rng=catan_island.seed)
+        assert catan_island.state.numbers == again.state.numbers
+
+    def test_board_stats(self):
+        from board_stats import BoardStats
+        stats = BoardStats()
+        for seed in range(5):
+            CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2, rng=seed, stats=stats)
+        assert stats.counters['boards'] == 5
+        assert stats.counters['number_attempts'] == 5 + stats.counters['number_resets']
+        assert set(stats.timings) == {'grid', 'resources', 'numbers'}
+
+        with self.assertRaises(BoardGenerationError):
+            CatanIsland(2, 1, {'Brick': 2, 'Wood': 2}, {'5': 2, '6': 1, '9': 1}, False, 2, number_attempts=5, stats=stats)
+        assert stats.counters['number_failures'] == 1
+        assert stats.counters['boards'] == 5
+
+    def test_vertex_graph(self):
+        graph = get_topology(5, 3).graph
+        # The base game has 54 places for settlements and 72 for roads
+        assert graph.size == 54
+        assert len(graph.edges) == 72
+        catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2)
+        state = catan_island.state
+        for vertex, tiles in enumerate(graph.vertex_tiles):
+            assert state.vertex_points[vertex] == sum(state.points[tile] for tile in tiles)
+        for vertex in graph.intersections:
+            assert 4 <= state.vertex_points[vertex] <= 12 or NO_NUMBER in [state.numbers[tile] for tile in graph.vertex_tiles[vertex]]
+        catan_island._reset_tile_numbers(range(catan_island.topology.size))
+        assert not any(state.vertex_points)
+
+    def test_hex_coords(self):
+        topology = get_topology(5, 3)
+        center = topology.center_order[0]
+        assert topology.positions[center] == 'C4'
+        for radius, size in ((0, 1), (1, 6), (2, 12), (3, 0)):
+            ring = topology.ring(center, radius)
+            assert len(ring) == size
+            assert all(topology.distance(center, tile) == radius for tile in ring)
+        for tile, adjacents in enumerate(topology.adjacents):
+            assert all(topology.distance(tile, adj) == 1 for adj in adjacents)
+        # Boards can have more than 26 rows
+        catan_island = CatanIsland(16, 2, {}, {})
+        assert catan_island.topology.vertical == 29
+        assert catan_island.tiles()[-1].pos == 'AC16'
+
+    def test_island_embedding(self):
+        board = get_topology(9, 5)
+        island = get_topology(5, 3)
+        for offset in (board.center_offset(island), board.edge_offset(island)):
+            tiles = board.embedding(island, offset)
+            # Tiles that are next to each other on the island are still next to each other on the board
+            for tile, neighbors in enumerate(island.neighbors):
+                for direction, neighbor in enumerate(neighbors):
+                    if neighbor is not None:
+                        assert board.neighbors[tiles[tile]][direction] == tiles[neighbor]
+        assert board.embedding(island, board.center_offset(island))[island.center_order[0]] == board.center_order[0]
+        assert board.embedding(island, board.edge_offset(island))[0] == 0
+        with self.assertRaises(ValueError):
+            island.embedding(board, (0, 0))
+
+    def test_enumerate_boards(self):
+        from board_enumeration import enumerate_boards
+        resources = {'Desert': 1, 'Brick': 2, 'Wood': 1, 'Grain': 2, 'Sheep': 1}
+        numbers = {'4': 1, '5': 1, '8': 1, '9': 1, '10': 1, '11': 1}
+        boards = list(enumerate_boards(3, 2, resources, numbers, True, 2))
+        scores = [total_diff for total_diff, board in boards]
+        assert scores == sorted(scores)
+        # No board is a rotation or reflection of another board
+        seen = set()
+        for total_diff, board in boards:
+            tiles = tuple(zip(board.state.resources, board.state.numbers))
+            for symmetry in board.topology.symmetries:
+                moved = [None] * len(tiles)
+                for tile, value in enumerate(tiles):
+                    moved[symmetry[tile]] = value
+                assert tuple(moved) not in seen
+            seen.add(tiles)
+
+    def test_best_boards(self):
+        from batch_generation import BoardSpec, best_boards
+        spec = BoardSpec(CatanIsland, 5, 3, self.base_resources, self.base_numbers, True, 2)
+        boards = best_boards(spec, 50, 3, processes=1, seed=7)
+        assert len(boards) == 3
+        assert [total_diff for total_diff, seed, board in boards] == sorted(total_diff for total_diff, seed, board in boards)
+        # Every board can be built again from its seed
+        for total_diff, seed, board in boards:
+            assert tuple(spec.build(seed).state.numbers) == tuple(board.state.numbers)
+
+    def test_stream_boards(self):
+        from batch_generation import BoardSpec
+        from board_stream import board_from_record, stream_boards
+        spec = BoardSpec(CatanIsland, 5, 3, self.base_resources, self.base_numbers, True, 2)
+        boards = list(stream_boards(spec, threshold=4, limit=5, seed=3))
+        assert len(boards) == 5
+        assert all(board.total_diff < 4 for board in boards)
+        # The same seed gives the same stream, and the records hold the same boards
+        records = list(stream_boards(spec, threshold=4, limit=5, seed=3, records=True))
+        for board, record in zip(boards, records):
+            assert record.seed == board.seed
+            assert board_from_record(record).state.numbers == board.state.numbers
+        # Seafarers boards come back as seafarers boards, with the same islands
+        from board_presets import preset_boards
+        board = next(preset_boards('seafarers_4_3_main_island_center', seed=1))
+        record = next(preset_boards('seafarers_4_3_main_island_center', seed=1, records=True))
+        loaded = board_from_record(record)
+        assert type(loaded) is type(board)
+        assert loaded.seed == board.seed
+        assert loaded.state.resources == board.state.resources
+        assert loaded.small_islands_indices == board.small_islands_indices
+        assert loaded.points_per_island == board.points_per_island
+        # Filters are applied to every board and tries stops the stream
+        has_desert_center = lambda board: board.state.resources[board.topology.center_order[0]] == DESERT
+        assert all(has_desert_center(board) for board in stream_boards(spec, filters=[has_desert_center], tries=10))
+        assert len(list(stream_boards(spec, tries=10))) <= 10
+
+    def test_presets(self):
+        from board_presets import Preset, load_presets
+        presets = load_presets()
+        assert 'three_four_player' in presets
+        for preset in presets.values():
+            assert preset.spec.args[0] == preset.topology.max_width
+        config = {
+            'board': 'catan',
+            'shape': [5, 3],
+            'resources': self.base_resources,
+            'numbers': self.base_numbers,
+        }
+        board = next(Preset('test', config).boards(tries=10))
+        assert board.topology is get_topology(5, 3)
+        # The counts are checked when the preset is loaded
+        for field, value in (('shape', [6, 3]), ('numbers', {'8': 17}), ('resources', {'Stone': 19})):
+            with self.assertRaises(ValueError):
+                Preset('test', {**config, field: value})
+
+    def test_feasibility(self):
+        from board_errors import InfeasibleConfigError
+        from board_feasibility import independence_bound
+        from seafarers_catan_board import SeafarerIslands
+        topology = get_topology(5, 3)
+        assert independence_bound(topology, range(topology.size)) == 7
+        # Too few resources, and more 6s and 8s than can be kept apart, are both reported at once
+        with self.assertRaises(InfeasibleConfigError) as raised:
+            CatanIsland(5, 3, {**self.base_resources, 'Wood': 3}, {**self.base_numbers, '3': 0, '11': 0, '6': 4, '8': 4})
+        self.assertEqual(len(raised.exception.problems), 2)
+        # Three 8s can't be placed on four tiles without two of them being next to each other
+        with self.assertRaises(InfeasibleConfigError):
+            CatanIsland(2, 1, {'Brick': 2, 'Wood': 2}, {'8': 3}, False, 2)
+        # Only 7 of the 19 tiles can be apart from each other
+        with self.assertRaises(ValueError):
+            CatanIsland(5, 3, {'Ore': 8, 'Wood': 6, 'Brick': 5}, {}, adj_resource_limit=1)
+        CatanIsland(5, 3, {'Ore': 7, 'Wood': 6, 'Brick': 6}, {}, adj_resource_limit=1)
+        with self.assertRaises(InfeasibleConfigError):
+            SeafarerIslands(7, 4, {'Sea': 10, 'Wood': 27}, {}, {}, {}, main_island_dimensions=(8, 3))
+
+    def test_seafarers_islands(self):
+        from board_presets import load_presets
+        from board_stats import BoardStats
+        from seafarers_catan_board import SeafarerIslands
+        for preset in load_presets().values():
+            if preset.board_class is not SeafarerIslands:
+                continue
+            resources = preset.spec.args[2]
+            main_island_size = get_topology(*preset.spec.kwargs['main_island_dimensions']).size
+            # The small islands get the land left over from the main island, as long as there is room for it with the sea
+            small_island_tiles = min(
+                sum(resources.values()) - resources.get('Sea', 0) - sum(preset.spec.args[3].values()),
+                preset.topology.size - main_island_size - resources.get('Sea', 0),
+            )
+            for seed in range(5):
+                board = preset.spec.build(seed)
+                assert len(board.small_islands_indices) == small_island_tiles
+                # Every island is surrounded by sea: the land splits into the main island and num_islands small islands
+                topology = board.topology
+                land = {tile for tile in range(topology.size) if board.state.resources[tile] not in (EMPTY, SEA)}
+                islands = []
+                while land:
+                    island = {land.pop()}
+                    stack = list(island)
+                    while stack:
+                        for adj in topology.adjacents[stack.pop()]:
+                            if adj in land:
+                                land.remove(adj)
+                                island.add(adj)
+                                stack.append(adj)
+                    islands.append(island)
+                assert len(islands) == preset.spec.kwargs['num_islands'] + 1
+                assert set(board.main_island_indices) in islands
+
+        # Islands that can't be kept apart are given up on after island_attempts, or once the time is up
+        spec = load_presets()['seafarers_4_1_main_island_edge'].spec
+        stats = BoardStats()
+        with self.assertRaises(BoardGenerationError):
+            SeafarerIslands(*spec.args, **{**spec.kwargs, 'num_islands': 8}, rng=1, island_attempts=3, stats=stats)
+        assert stats.counters['island_restarts'] == 3
+        with self.assertRaises(BoardGenerationError):
+            SeafarerIslands(*spec.args, **spec.kwargs, rng=1, time_budget=0)
+
+    def test_board_store(self):
+        import os
+        import tempfile
+        from board_presets import preset_boards
+        from board_store import BoardStore, Refill
+        from board_stream import board_from_record
+        with tempfile.TemporaryDirectory() as directory, BoardStore(os.path.join(directory, 'boards.db'), rng=1) as store:
+            assert store.fill('three_four_player', 20, seed=1) == 20
+            threshold = sorted(store.random('three_four_player').total_diff for i in range(20))[10]
+            record = store.random('three_four_player', threshold)
+            assert record.total_diff < threshold
+            assert record.seed >= 0
+            self.assertAlmostEqual(board_from_record(record).total_diff, record.total_diff)
+            assert store.random('five_six_player') is None
+
+            under = store.count('three_four_player', threshold)
+            taken = store.take('three_four_player', threshold, count=under + 1)
+            assert len(taken) == under
+            assert all(record.total_diff < threshold for record in taken)
+            assert store.count('three_four_player') == 20 - under
+
+            # The refill tops the store up to the target once it drops under low (and leaves it alone after that)
+            refill = Refill(store, 'three_four_player', low=25, target=30, batch_size=4, seed=1)
+            assert refill.top_up() == 10 + under
+            assert store.count('three_four_player') == 30
+            assert refill.top_up() == 0
+            # Every batch is generated from a seed of its own, so no board is stored twice
+            seeds = [record.seed for record in store.take('three_four_player', count=30)]
+            assert len(set(seeds)) == 30
+
+            # Seafarers boards come out of the store as the boards that went in
+            board = next(preset_boards('seafarers_4_3_main_island_center', seed=1))
+            store.add('seafarers_4_3_main_island_center', [board])
+            loaded = board_from_record(store.random('seafarers_4_3_main_island_center'))
+            assert type(loaded) is type(board)
+            assert loaded.state.numbers == board.state.numbers
+            assert loaded.points_per_island == board.points_per_island
+
+    def test_board_service(self):
+        import asyncio
+        import json
+        from board_presets import preset_boards
+        from board_service import BoardService, record_json
+
+        async def get(port, path):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+            response = await reader.read()
+            writer.close()
+            head, body = response.split(b'\r\n\r\n', 1)
+            return int(head.split()[1]), json.loads(body)
+
+        async def run():
+            service = BoardService(['three_four_player'], pool_size=4, low=0, batch_size=2, processes=1, wait=0,
+                read_timeout=0.2)
+            server = await service.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                await asyncio.wait_for(service.ready(), 30)
+                status, board = await get(port, '/boards/three_four_player')
+                assert status == 200
+                assert len(board['resources']) == len(board['numbers']) == 19
+                assert board['board'] == 'catan' and board['main_island'] is None
+                status, boards = await get(port, '/boards/three_four_player?count=3')
+                assert status == 200 and len(boards) == 3
+                # The pool is drained (and with low=0 never refilled), so the next request is turned away
+                status, error = await get(port, '/boards/three_four_player')
+                assert status == 503
+                assert (await get(port, '/boards/five_six_player'))[0] == 404
+                status, metrics = await get(port, '/metrics')
+                pool = metrics['pools']['three_four_player']
+                assert pool['served'] == 4 and pool['rejected'] == 1
+                # A client that never sends its request is answered with a 408 instead of being waited on forever
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                response = await asyncio.wait_for(reader.read(), 5)
+                writer.close()
+                assert int(response.split()[1]) == 408
+                # A request line longer than the stream can hold is answered with a 400
+                assert (await get(port, '/boards/' + 'x' * 100000))[0] == 400
+            finally:
+                await service.close()
+
+        asyncio.run(run())
+
+        # A seafarers board is served with its main island, so it can be built again
+        record = next(preset_boards('seafarers_4_3_main_island_center', seed=1, records=True))
+        served = record_json('seafarers_4_3_main_island_center', record)
+        assert served['board'] == 'seafarers'
+        assert served['main_island'] == {'shape': [4, 3], 'center': True}
+
+    def test_serialization(self):
+        from board_serialization import dumps, from_json, pack, unpack, unpack_all
+        from board_presets import preset_boards
+        for name in ('three_four_player', 'seafarers_4_3_main_island_center'):
+            board = next(preset_boards(name, seed=1))
+            packed = pack(board)
+            for loaded in (unpack(packed), from_json(dumps(board))):
+                assert type(loaded) is type(board)
+                assert loaded.state.resources == board.state.resources
+                assert loaded.state.numbers == board.state.numbers
+                assert loaded.seed == board.seed
+                self.assertAlmostEqual(loaded.total_diff, board.total_diff)
+            # Packed boards can be read back one after the other
+            assert len(list(unpack_all(packed + pack(board, seed=False)))) == 2
+        # The base game packs into 22 bytes (30 with the seed)
+        board = next(preset_boards('three_four_player'))
+        assert len(pack(board, seed=False)) == 22
+        assert len(pack(board)) == 30
+        with self.assertRaises(ValueError):
+            from_json(dumps(board).replace('"version": 1', '"version": 2'))
+
+    def test_render(self):
+        import io
+        from board_render import STYLES, render, write_boards
+        catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2)
+        # The middle row is drawn the way the grid always was: a cell for every tile with a blank cell between them
+        middle = render(catan_island, 'resources').split('\n')[5]
+        row = catan_island.island[2]
+        assert middle == ''.join('  ' if tile is None else f'| {tile.resource[0]} |' for tile in row)
+        assert render(catan_island, 'hex').count('De') == 1
+        stream = io.StringIO()
+        assert write_boards([catan_island] * 3, stream, 'numbers') == 3
+        assert stream.getvalue() == render(catan_island, 'numbers') * 3
+        for style in STYLES:
+            assert render(catan_island, style)
+        with self.assertRaises(ValueError):
+            render(catan_island, 'svg')
+
+    def test_svg(self):
+        import os
+        import tempfile
+        from xml.dom.minidom import parseString
+        from board_svg import render_svg, write_html, write_svgs
+        catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2)
+        svg = parseString(render_svg(catan_island).encode())
+        uses = [use.getAttribute('href') for use in svg.getElementsByTagName('use')]
+        # A hex for every tile, a token for every number and a pip for every point
+        assert uses.count('#hex') == 19
+        assert uses.count('#token') == 18
+        assert uses.count('#pip') == sum(catan_island.total_points_per_resource.values())
+        with tempfile.TemporaryDirectory() as directory:
+            assert len(write_svgs([catan_island] * 3, directory)) == 3
+            path = os.path.join(directory, 'boards.html')
+            assert write_html([catan_island] * 5, path, per_page=2) == 5
+            with open(path) as html_file:
+                html = html_file.read()
+            assert html.count('<section>') == 3
+            assert html.count('id="hex"') == 1
+
+    def test_simulation(self):
+        from board_simulation import ROLL_CHANCES, fairness_filter, roll_counts, simulate
+        from board_stream import stream_boards
+        from batch_generation import BoardSpec
+        catan_island = CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2, rng=1)
+        assert (roll_counts(10, 60, seed=1).sum(axis=1) == 60).all()
+
+        results = simulate(catan_island, games=20000, turns=36, seed=1)
+        state = catan_island.state
+        for resource, mean in results['resource_mean'].items():
+            # On average each number comes up as often as its chance says
+            expected = 36 * sum(
+                ROLL_CHANCES[state.numbers[tile]] for tile in range(19) if RESOURCES[state.resources[tile]] == resource
+            )
+            self.assertAlmostEqual(mean, expected, delta=0.05 * expected)
+        graph = catan_island.topology.graph
+        settlements = [vertex for positions in results['positions'] for vertex in positions]
+        assert len(set(settlements)) == 8
+        for vertex in settlements:
+            assert not set(graph.vertex_neighbors[vertex]) & set(settlements)
+        assert results['fairness'] == max(results['player_mean']) - min(results['player_mean'])
+
+        # The filter plugs straight into a stream of boards
+        spec = BoardSpec(CatanIsland, 5, 3, self.base_resources, self.base_numbers)
+        for board in stream_boards(spec, limit=3, filters=[fairness_filter(4)], seed=1):
+            assert simulate(board, games=500, seed=0)['fairness'] <= 4
+
+    def test_score_boards(self):
+        from balance_scoring import score_boards
+        boards = [CatanIsland(5, 3, self.base_resources, self.base_numbers, True, 2) for x in range(20)]
+        metrics = score_boards(boards)
+        for board, total_diff in zip(boards, metrics['total_diff']):
+            self.assertAlmostEqual(total_diff, balance_score(board.calculate_points_per_resource()))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,101 @@
+# python3
+# cluster_index.py - Keeps track of the connected clusters of same resource tiles as a board is filled in.
+
+from board_state import EMPTY
+
+
+class ClusterIndex:
+    """
+    Union-find over the tiles of a board, where two tiles are in the same cluster
+    if they are connected through tiles of the same resource.
+
+    All resource placements go through assign and clear, so the size of any cluster,
+    and the size a cluster would become if a resource were placed on a tile,
+    is a lookup instead of a flood fill.
+    Assigning a tile is O(α(n)). Clearing a tile only rebuilds the cluster the tile was in,
+    which is never bigger than the adjacent resource limit for the resources being placed.
+    """
+
+    def __init__(self, topology, tile_resources):
+        self.adjacents = topology.adjacents
+        self.tile_resources = tile_resources
+        self.parent = list(range(topology.size))
+        # The tiles in each cluster, only kept up to date for the root of the cluster
+        self.members = [[tile] for tile in range(topology.size)]
+
+        for tile in range(topology.size):
+            if tile_resources[tile] != EMPTY:
+                self._link(tile)
+
+    def find(self, tile):
+        parent = self.parent
+        while parent[tile] != tile:
+            parent[tile] = parent[parent[tile]]
+            tile = parent[tile]
+        return tile
+
+    def _union(self, tile_1, tile_2):
+        root_1 = self.find(tile_1)
+        root_2 = self.find(tile_2)
+        if root_1 == root_2:
+            return
+        # Always merge the smaller cluster into the larger one
+        if len(self.members[root_1]) < len(self.members[root_2]):
+            root_1, root_2 = root_2, root_1
+        self.parent[root_2] = root_1
+        self.members[root_1].extend(self.members[root_2])
+        self.members[root_2] = []
+
+    def _link(self, tile):
+        """
+        Joins the tile with every adjacent tile of the same resource.
+        """
+        resource = self.tile_resources[tile]
+        for adj in self.adjacents[tile]:
+            if self.tile_resources[adj] == resource:
+                self._union(tile, adj)
+
+    def cluster(self, tile):
+        """
+        Returns the tiles in the same cluster as the tile (including the tile itself).
+        """
+        return self.members[self.find(tile)]
+
+    def size(self, tile):
+        return len(self.members[self.find(tile)])
+
+    def merged_size(self, tile, resource):
+        """
+        Returns how big the cluster would be if the resource were placed on the tile.
+        """
+        tile_resources = self.tile_resources
+        roots = []
+        size = 1
+        for adj in self.adjacents[tile]:
+            if tile_resources[adj] == resource:
+                root = self.find(adj)
+                if root not in roots:
+                    roots.append(root)
+                    size += len(self.members[root])
+
+        return size
+
+    def assign(self, tile, resource):
+        """
+        Places the resource on an empty tile.
+        """
+        self.tile_resources[tile] = resource
+        self._link(tile)
+
+    def clear(self, tile):
+        """
+        Removes the resource from the tile and splits up what is left of its cluster.
+        """
+        cluster = self.cluster(tile)
+        self.tile_resources[tile] = EMPTY
+        for member in cluster:
+            self.parent[member] = member
+            self.members[member] = [member]
+        for member in cluster:
+            if member != tile:
+                self._link(member)
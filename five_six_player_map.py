@@ -1,54 +1,19 @@
 # python3
 # five_six_player_map.py - generates a five to six player island map.
 
-from catan_board import CatanIsland
+from board_presets import preset_boards, print_boards
 
 
-def generate_five_six_player_island():
+def boards(**kwargs):
     """
-    Creates several potential five to six player 
-    Catan maps.
+    Lazily yields the boards of this map (see board_stream.stream_boards for the arguments).
     """
-    # The lower this number is the more balanced the board will be; however, 
-    # the number of possible boards will also be lower
-    BALANCE_PARAMETER = 3
+    return preset_boards('five_six_player', **kwargs)
+
 
-    for x in range(100):
-        five_six_player_resources = {
-            'Brick': 5,
-            'Wood': 6,
-            'Ore': 5,
-            'Grain': 6,
-            'Sheep': 6,
-            'Desert': 2,
-        }
-        five_six_player_numbers = {
-            '2': 2, 
-            '3': 3, 
-            '4': 3, 
-            '5': 3, 
-            '6': 3, 
-            '8': 3, 
-            '9': 3, 
-            '10': 3, 
-            '11': 3, 
-            '12': 2, 
-        }
-        
-        catan = CatanIsland(6, 3, five_six_player_resources, five_six_player_numbers, True, 2)
-        # Only print the resources and the numbers if the game is balanced
-        game_balance = catan.calculate_points_per_resource()
-        average_points = sum(game_balance.values()) / len(game_balance.values())
-        total_diff = 0
-        for points in game_balance.values():
-            total_diff += abs(average_points - points)
+def generate_five_six_player_island():
+    print_boards('five_six_player')
 
-        # print(total_diff)
-        if total_diff < BALANCE_PARAMETER:
-            print()
-            catan.print_resources()
-            catan.print_numbers()
-            print()
 
 if __name__ == "__main__":
     generate_five_six_player_island()
@@ -0,0 +1,82 @@
+# python3
+# hex_coords.py - Axial hex coordinates (neighbors, distances and rings) and the labels tiles are shown with.
+
+from string import ascii_uppercase
+
+
+# Axial (q, r) offsets for each of the directions in hex_topology.DIRECTIONS
+# (right, top_right, top_left, left, bottom_left, bottom_right).
+AXIAL_DIRECTIONS = (
+    (1, 0),
+    (1, -1),
+    (0, -1),
+    (-1, 0),
+    (-1, 1),
+    (0, 1),
+)
+
+
+def axial_from_doubled(x, y):
+    """
+    Returns the axial (q, r) coordinates of the tile at (x, y) on the grid,
+    where horizontal neighbors are two apart (see hex_topology.DIRECTION_OFFSETS).
+    The rows of an island are all offset the same way, so for tiles of one island
+    this is the same mapping up to a fixed shift of q.
+    """
+    return (x - y) // 2, y
+
+
+def neighbor(coord, direction):
+    """
+    Returns the axial coordinates next to coord in the given direction (an index into AXIAL_DIRECTIONS).
+    """
+    dq, dr = AXIAL_DIRECTIONS[direction]
+    return coord[0] + dq, coord[1] + dr
+
+
+def distance(a, b):
+    """
+    The number of steps between two axial coordinates.
+    """
+    dq = a[0] - b[0]
+    dr = a[1] - b[1]
+    return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+
+def ring(center, radius):
+    """
+    Returns the axial coordinates exactly radius steps away from center,
+    going around the ring starting from the bottom left.
+    """
+    if radius == 0:
+        return [center]
+    q, r = center
+    dq, dr = AXIAL_DIRECTIONS[4]
+    coord = (q + dq * radius, r + dr * radius)
+    coords = []
+    for direction in range(6):
+        for step in range(radius):
+            coords.append(coord)
+            coord = neighbor(coord, direction)
+
+    return coords
+
+
+def row_label(y):
+    """
+    Returns the letters row y is shown with: A to Z, then AA, AB and so on.
+    """
+    label = ''
+    y += 1
+    while y > 0:
+        y, letter = divmod(y - 1, 26)
+        label = ascii_uppercase[letter] + label
+
+    return label
+
+
+def tile_label(x, y):
+    """
+    Returns the label a tile is shown with, like 'C4' (the row's letters and then x).
+    """
+    return f'{row_label(y)}{x}'
@@ -0,0 +1,261 @@
+# python3
+# hex_topology.py - Precomputed hex grid geometry shared by every board of the same shape.
+
+from hex_coords import axial_from_doubled, distance, ring, tile_label
+
+
+# The order neighbors are stored in for every tile.
+# This matches the positional relationships on the Tile class.
+DIRECTIONS = (
+    'right',
+    'top_right',
+    'top_left',
+    'left',
+    'bottom_left',
+    'bottom_right',
+)
+# (x, y) offsets on the grid for each of the directions above.
+# Horizontal neighbors are two apart since each row is offset by one.
+DIRECTION_OFFSETS = (
+    (2, 0),
+    (1, -1),
+    (-1, -1),
+    (-2, 0),
+    (-1, 1),
+    (1, 1),
+)
+
+
+class HexTopology:
+    """
+    The geometry of a hexagonal island given its max and min width.
+    Holds the position of every tile, the neighbor indices of every tile
+    and which tiles sit on the edges and corners of the island.
+
+    Tiles are referred to by their index, which follows the same order
+    the tiles are created in (top row first, left to right).
+    Nothing in here changes once it is built, so one topology is shared
+    by every board of the same shape (see get_topology).
+    """
+
+    def __init__(self, max_width, min_width):
+        self.max_width = max_width
+        self.min_width = min_width
+
+        # Reference variables
+        self.diff = max_width - min_width
+        self.vertical = (self.diff * 2) + 1
+        self.horizontal = max_width + (max_width - 1)
+
+        positions = []
+        coords = []
+        rows = []
+        for y in range(self.vertical):
+            # Since the island is a hexagon each row is offset
+            # by one more (or one less) than the row above it
+            offset = abs(self.diff - y)
+            row = []
+            for x in range(offset, self.horizontal - offset, 2):
+                row.append(len(coords))
+                coords.append((x, y))
+                positions.append(tile_label(x, y))
+            rows.append(tuple(row))
+
+        self.positions = tuple(positions)
+        self.coords = tuple(coords)
+        self.rows = tuple(rows)
+        self.size = len(coords)
+        self.index_of = {coord: i for i, coord in enumerate(coords)}
+        # The labels (like 'C4') are only for showing the tiles,
+        # everything else works with the tile indices and their axial coordinates
+        self.index_by_pos = {pos: i for i, pos in enumerate(positions)}
+        self.axial = tuple(axial_from_doubled(x, y) for x, y in coords)
+        self.index_of_axial = {coord: i for i, coord in enumerate(self.axial)}
+
+        # Neighbor indices in the order of DIRECTIONS (None where there is no tile)
+        # and the list of neighbors that actually exist for each tile.
+        neighbors = []
+        for x, y in coords:
+            neighbors.append(tuple(
+                self.index_of.get((x + dx, y + dy)) for dx, dy in DIRECTION_OFFSETS
+            ))
+        self.neighbors = tuple(neighbors)
+        self.adjacents = tuple(
+            tuple(n for n in tile_neighbors if n is not None) for tile_neighbors in neighbors
+        )
+
+        # Edge tiles are missing at least one neighbor
+        self.is_edge = tuple(len(adjacents) < 6 for adjacents in self.adjacents)
+        middle = rows[self.diff]
+        self.corners = {
+            'top_left': rows[0][0],
+            'top_right': rows[0][-1],
+            'left': middle[0],
+            'right': middle[-1],
+            'bottom_left': rows[-1][0],
+            'bottom_right': rows[-1][-1],
+        }
+
+        self.center_order = self._find_center_order()
+        self._symmetries = None
+        self._graph = None
+        self._embeddings = {}
+
+    def __reduce__(self):
+        # Boards sent between processes look their topology back up
+        # instead of carrying a copy of it along
+        return get_topology, (self.max_width, self.min_width)
+
+    @property
+    def symmetries(self):
+        """
+        The rotations and reflections of the hexagon that map the island onto itself.
+        Each one is a tuple giving, for every tile, the tile it is moved to.
+        (The first one is always the identity.)
+        """
+        if self._symmetries is None:
+            self._symmetries = self._find_symmetries()
+        return self._symmetries
+
+    def distance(self, a, b):
+        """
+        The number of steps between two tiles.
+        """
+        return distance(self.axial[a], self.axial[b])
+
+    def ring(self, tile, radius):
+        """
+        The tiles exactly radius steps away from the given tile (leaving out the ones off the island).
+        """
+        index_of_axial = self.index_of_axial
+        return [
+            index_of_axial[coord] for coord in ring(self.axial[tile], radius) if coord in index_of_axial
+        ]
+
+    def embedding(self, other, offset):
+        """
+        Maps the tiles of a smaller island onto this one, moved by the given (x, y) offset.
+        Returns the index on this island of every tile of the other island (in the other island's order).
+        Raises a ValueError if the other island doesn't fit at that offset.
+        """
+        key = (other.max_width, other.min_width, offset)
+        mapping = self._embeddings.get(key)
+        if mapping is None:
+            dx, dy = offset
+            mapping = []
+            for x, y in other.coords:
+                index = self.index_of.get((x + dx, y + dy))
+                if index is None:
+                    raise ValueError(
+                        f"A {other.max_width} - {other.min_width} island doesn't fit "
+                        f"on a {self.max_width} - {self.min_width} island at {offset}"
+                    )
+                mapping.append(index)
+            mapping = tuple(mapping)
+            self._embeddings[key] = mapping
+
+        return mapping
+
+    def center_offset(self, other):
+        """
+        The (x, y) offset that puts the center of a smaller island on the center of this one.
+        When the centers don't line up on a tile the smaller island is moved one to the left.
+        """
+        dx = self.max_width - other.max_width
+        dy = self.diff - other.diff
+        if dx % 2 != 0:
+            dx -= 1
+        return dx, dy
+
+    def edge_offset(self, other):
+        """
+        The (x, y) offset that puts a smaller island in the top left corner of this one.
+        """
+        return self.diff - other.diff, 0
+
+    @property
+    def graph(self):
+        """
+        The VertexGraph of the intersections and roads between the tiles,
+        built the first time it is asked for.
+        """
+        if self._graph is None:
+            from vertex_graph import VertexGraph
+            self._graph = VertexGraph(self)
+        return self._graph
+
+    def _find_symmetries(self):
+        # Work in cube coordinates around the center of the island,
+        # doubled so that the center doesn't have to fall on a tile.
+        cube_coords = []
+        for x, y in self.coords:
+            col = 2 * x - (self.horizontal - 1)
+            row = 2 * (y - self.diff)
+            q = (col - row) // 2
+            cube_coords.append((q, row, -q - row))
+
+        transforms = []
+        for reflect in (False, True):
+            for rotation in range(6):
+                transforms.append((reflect, rotation))
+
+        symmetries = []
+        for reflect, rotation in transforms:
+            mapping = []
+            for q, r, s in cube_coords:
+                if reflect:
+                    r, s = s, r
+                for i in range(rotation):
+                    q, r, s = -r, -s, -q
+                col = 2 * q + r
+                x = (col + self.horizontal - 1) // 2
+                y = r // 2 + self.diff
+                index = self.index_of.get((x, y))
+                if index is None:
+                    break
+                mapping.append(index)
+            else:
+                mapping = tuple(mapping)
+                if mapping not in symmetries:
+                    symmetries.append(mapping)
+
+        return tuple(symmetries)
+
+    def _find_center_order(self):
+        """
+        Finds the order the desert tiles are placed in when they are placed in the center.
+        Starting from the center of the middle row, the tiles are tried
+        one to the right, then one to the left, and then further and further to the left.
+        """
+        y = self.diff
+        horz = self.horizontal // 2
+        order = []
+        i = 0
+        while horz >= 0:
+            if i % 2 == 0:
+                horz += 1
+            else:
+                horz -= 2
+            index = self.index_of.get((horz, y))
+            if index is not None and index not in order:
+                order.append(index)
+            i += 1
+
+        return tuple(order)
+
+
+_topologies = {}
+
+
+def get_topology(max_width, min_width):
+    """
+    Returns the topology for the given island shape.
+    Each shape is only ever built once and then reused for every board.
+    """
+    key = (max_width, min_width)
+    topology = _topologies.get(key)
+    if topology is None:
+        topology = HexTopology(max_width, min_width)
+        _topologies[key] = topology
+
+    return topology
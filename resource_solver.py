@@ -0,0 +1,156 @@
+# python3
+# resource_solver.py - Backtracking search that places resources on a board without blind retries.
+
+from board_errors import BoardGenerationError
+from board_random import make_rng
+from board_state import EMPTY
+from cluster_index import ClusterIndex
+
+
+def _count_bits(mask):
+    return bin(mask).count('1')
+
+
+class ResourceSolver:
+    """
+    Places resources on the tiles of a board so that no more than
+    adj_resource_limit tiles of the same resource are ever connected
+    (this includes strings of resources).
+
+    Every tile keeps a domain of the resources it can still take.
+    The tile with the fewest options is filled next (most constrained first),
+    and after every placement the domains of the surrounding tiles are updated (forward checking),
+    so a dead end is found as soon as any tile runs out of options instead of
+    after the board is filled in.
+    Cluster sizes are looked up in a ClusterIndex that is updated as tiles are filled in and cleared.
+    The order the options are tried in is random, weighted by how many of each resource are left,
+    so the same seed always gives the same board.
+
+    Each attempt is given a budget of backtracks, after which the search starts
+    over with a new random order. If every attempt runs out, a BoardGenerationError is raised.
+    """
+
+    def __init__(self, topology, tile_resources, adj_resource_limit=2, rng=None, max_backtracks=500, max_restarts=50, clusters=None):
+        self.topology = topology
+        self.tile_resources = tile_resources
+        self.adj_resource_limit = adj_resource_limit
+        self.rng = make_rng(rng)[0]
+        self.max_backtracks = max_backtracks
+        self.max_restarts = max_restarts
+        if clusters is None:
+            clusters = ClusterIndex(topology, tile_resources)
+        self.clusters = clusters
+
+        # Backtracks in the current attempt, in every attempt, and how many times the search started over
+        self.backtracks = 0
+        self.total_backtracks = 0
+        self.restarts = 0
+
+    def _fits(self, tile, resource):
+        """
+        Checks if placing the resource on the tile keeps its cluster within the limit.
+        """
+        return self.clusters.merged_size(tile, resource) <= self.adj_resource_limit
+
+    def _domain(self, tile, remaining):
+        mask = 0
+        for resource, quantity in remaining.items():
+            if quantity > 0 and self._fits(tile, resource):
+                mask |= 1 << resource
+
+        return mask
+
+    def _order_values(self, mask, remaining):
+        """
+        Orders the resources in the domain randomly,
+        with the resources that have more tiles left more likely to come first.
+        """
+        rng = self.rng
+        keyed = []
+        resource = 0
+        while mask:
+            if mask & 1:
+                keyed.append((rng.random() ** (1 / remaining[resource]), resource))
+            mask >>= 1
+            resource += 1
+        keyed.sort(reverse=True)
+
+        return [resource for key, resource in keyed]
+
+    def _forward_check(self, tile, resource, remaining, unassigned, domains):
+        """
+        Removes the resource from the domains it no longer fits in after being placed on the tile.
+        Returns the list of changes made (to undo them) and whether any tile ran out of options.
+        """
+        bit = 1 << resource
+        changes = []
+        if remaining[resource] == 0:
+            affected = unassigned
+        else:
+            adjacents = self.topology.adjacents
+            affected = {adj for member in self.clusters.cluster(tile) for adj in adjacents[member] if adj in unassigned}
+
+        for other in affected:
+            mask = domains[other]
+            if mask & bit and (remaining[resource] == 0 or not self._fits(other, resource)):
+                changes.append((other, mask))
+                domains[other] = mask & ~bit
+                if domains[other] == 0:
+                    return changes, False
+
+        return changes, True
+
+    def _search(self, unassigned, domains, remaining, tie_breaks):
+        if not unassigned:
+            return True
+
+        # Most constrained tile first
+        tile = min(unassigned, key=lambda t: (_count_bits(domains[t]), tie_breaks[t]))
+        unassigned.remove(tile)
+
+        for resource in self._order_values(domains[tile], remaining):
+            self.clusters.assign(tile, resource)
+            remaining[resource] -= 1
+
+            changes, consistent = self._forward_check(tile, resource, remaining, unassigned, domains)
+            if consistent and self._search(unassigned, domains, remaining, tie_breaks):
+                return True
+
+            for other, mask in changes:
+                domains[other] = mask
+            remaining[resource] += 1
+            self.clusters.clear(tile)
+
+            self.backtracks += 1
+            if self.backtracks >= self.max_backtracks:
+                break
+
+        unassigned.add(tile)
+        return False
+
+    def solve(self, tiles, resources_dict):
+        """
+        Places resources (by code, with the quantity of each) on the given empty tiles.
+        There can be more resources than tiles, in which case some are left over.
+        """
+        tiles = list(tiles)
+        for attempt in range(self.max_restarts):
+            remaining = {resource: quantity for resource, quantity in resources_dict.items() if quantity > 0}
+            domains = {tile: self._domain(tile, remaining) for tile in tiles}
+            tie_breaks = {tile: self.rng.random() for tile in tiles}
+            self.backtracks = 0
+
+            found = all(domains.values()) and self._search(set(tiles), domains, remaining, tie_breaks)
+            self.total_backtracks += self.backtracks
+            if found:
+                return True
+
+            self.restarts += 1
+            for tile in tiles:
+                if self.tile_resources[tile] != EMPTY:
+                    self.clusters.clear(tile)
+
+        raise BoardGenerationError(
+            f"Could not place the resources on {len(tiles)} tiles "
+            f"after {self.max_restarts} attempts"
+        )
@@ -2,61 +2,47 @@
 # seafarers_catan_board.py - Creates a Catan board using the seafarers expansion to make several different surrounding islands.
 
 from collections import deque
-from math import ceil, floor
-from random import randint, shuffle
-from string import ascii_uppercase
+from time import perf_counter
 
-from catan_board import CatanIsland
+from board_errors import BoardGenerationError
+from board_feasibility import check_seafarers
+from board_random import make_rng
+from board_render import TextLayout
+from board_stats import phase
+from board_state import RESOURCES, EMPTY, DESERT, SEA, NO_NUMBER, NUMBER_POINTS, resource_code, number_code
+from catan_board import CatanIsland, SCORED_RESOURCES
+from hex_topology import get_topology
+from resource_solver import ResourceSolver
+
+
+# The islands the tiles of the board are counted on (see BoardState.set_islands):
+# the main island (along with the sea) and the small islands
+MAIN_ISLAND = 0
+SMALL_ISLANDS = 1
+
+# How many tiles each small island is grown from before the island before it is grown again
+ISLAND_STARTS = 10
+
+# How many islands are grown in one attempt (counting the ones grown again) before all the islands are started over
+ISLAND_STEPS = 400
+
+# How much the small islands are left to chance: without it every island starts in a corner of the free tiles
+# and grows onto the tile that takes up the least sea, which packs them in tightly but always the same way
+ISLAND_JITTER = 6
 
 
 class SeafarerIslands(CatanIsland):
-    
+
+    # The resources are told apart by two letters, since Sea and Sheep start with the same one (see board_render)
+    text_layout = TextLayout(line='____', resource_width=2, number_blank='    ')
+
     def __init__(self, max_width, min_width, 
             resource_dict, main_island_resources, main_island_numbers_dict, small_islands_numbers_dict, 
             adj_resource_limit=2, main_island_center=False, main_island_dimensions=(5, 3), main_island_desert_center=True,
-            num_islands=4
+            num_islands=4, number_attempts=200, time_budget=None, rng=None, stats=None, island_attempts=20
             ):
         
         # Constants
-        self.letters = list(ascii_uppercase)
-        self.number_to_letter = {
-            0: 'A',
-            1: 'A',
-            2: 'B',
-            3: 'C',
-            4: 'D',
-            5: 'E',
-            6: 'F',
-            7: 'G',
-            8: 'H',
-            9: 'I',
-            10: 'J',
-            11: 'K',
-            13: 'L',
-            14: 'M',
-            15: 'N',
-            16: 'O',
-            17: 'P',
-        }
-        self.letter_to_number = {
-            'A': 0,
-            'A': 1,
-            'B': 2,
-            'C': 3,
-            'D': 4,
-            'E': 5,
-            'F': 6,
-            'G': 7,
-            'H': 8,
-            'I': 9,
-            'J': 10,
-            'K': 11,
-            'L': 13,
-            'M': 14,
-            'N': 15,
-            'O': 16,
-            'P': 17,
-        }
         self.num_to_points = {
             '2': 1, 
             '3': 2, 
@@ -102,12 +88,8 @@ class SeafarerIslands(CatanIsland):
             ]
         
         # Tile Information:
-        self.position_dict = {}
-        self.main_island_position_dict = {}
-        self.main_island_tiles_by_resource = {}
-        self.small_islands_position_dict = {}
-        self.small_islands_tiles_by_resource = {}
-        self.total_points_per_resource = {}
+        self.main_island_indices = []
+        self.small_islands_indices = []
         self.resource_numbers = {}
         self.resource_points = {}
         self.resources_dict = resource_dict
@@ -119,43 +101,134 @@ class SeafarerIslands(CatanIsland):
         self.resources = resource_dict
         self.main_island_numbers = main_island_numbers_dict
         self.small_island_numbers_dict = small_islands_numbers_dict
+        self.main_island_dimensions = tuple(main_island_dimensions)
+        self.main_island_center = main_island_center
 
         # Reference variables
-        self.diff = self.max_width - self.min_width
-        self.vertical = (self.diff * 2) + 1
-        self.horizontal = self.max_width + (self.max_width - 1)
+        self.topology = get_topology(max_width, min_width)
+        self.diff = self.topology.diff
+        self.vertical = self.topology.vertical
+        self.horizontal = self.topology.horizontal
         self.dead_tiles = ['Desert', 'Sea', None]
 
-        self.island = self._create_island()
+        # Generation budget
+        if number_attempts < 1:
+            raise ValueError(f"number_attempts must be at least 1, not {number_attempts}")
+        self.number_attempts = number_attempts
+        if island_attempts < 1:
+            raise ValueError(f"island_attempts must be at least 1, not {island_attempts}")
+        self.island_attempts = island_attempts
+        self.deadline = None if time_budget is None else perf_counter() + time_budget
+
+        # The board's own random number generator (see CatanIsland)
+        self.rng, self.seed = make_rng(rng)
+        # Optional BoardStats (see CatanIsland)
+        self.stats = stats
+
+        # Fail straight away on inputs no board can ever be made from (see CatanIsland)
+        if resource_dict != {}:
+            check_seafarers(
+                max_width, min_width, resource_dict, main_island_resources,
+                main_island_numbers_dict, small_islands_numbers_dict, adj_resource_limit,
+                main_island_center, main_island_dimensions, main_island_desert_center, num_islands,
+            )
+
+        with phase(stats, 'grid'):
+            self.state = self._create_island()
+        self._position_dict = None
 
         if resource_dict != {}:
-            self._place_resources(resource_dict, main_island_resources, 
-                adj_resource_limit,
-                main_island_center, main_island_dimensions, main_island_desert_center, 
-                num_islands)
+            with phase(stats, 'resources'):
+                self._place_resources(resource_dict, main_island_resources, 
+                    adj_resource_limit,
+                    main_island_center, main_island_dimensions, main_island_desert_center, 
+                    num_islands)
+                self.state.count_resources()
         if main_island_numbers_dict != {} and small_islands_numbers_dict != {}:
-            self._place_numbers_by_resource_main_island(main_island_numbers_dict)
-            self._place_numbers_by_resource_smaller_islands(small_islands_numbers_dict)
+            with phase(stats, 'numbers'):
+                self._place_numbers_by_resource_main_island(main_island_numbers_dict)
+                self._place_numbers_by_resource_smaller_islands(small_islands_numbers_dict)
+        if stats is not None:
+            stats.count('boards')
+
+    @classmethod
+    def from_layout(cls, max_width, min_width, resources, numbers, main_island_dimensions=(5, 3), main_island_center=False):
+        """
+        Creates the islands with the given resource and number on each tile (in tile order)
+        without running any of the placement (see CatanIsland.from_layout).
+        The main island is found from where it would have been placed, and the small islands are the rest of the land.
+        """
+        board = cls(max_width, min_width, {}, {}, {}, {},
+            main_island_center=main_island_center, main_island_dimensions=main_island_dimensions)
+        state = board.state
+        for tile, (resource, number) in enumerate(zip(resources, numbers)):
+            state.set_resource(tile, resource_code(resource))
+            state.set_number(tile, number_code(number))
+
+        topology = board.topology
+        main_island_topology = get_topology(*main_island_dimensions)
+        if main_island_center == True:
+            offset = topology.center_offset(main_island_topology)
+        else:
+            offset = topology.edge_offset(main_island_topology)
+        board.main_island_indices = list(topology.embedding(main_island_topology, offset))
+        board._set_small_islands()
+
+        return board
+
+    def _set_small_islands(self):
+        """
+        Finds the small islands (every tile with a live resource that isn't on the main island)
+        and counts the points of each island from here on (see points_per_island).
+        """
+        tile_resources = self.state.resources
+        main_island_set = set(self.main_island_indices)
+        self.small_islands_indices = [
+            tile for tile in range(self.topology.size) if tile not in main_island_set and tile_resources[tile] > SEA
+        ]
+        tile_islands = [MAIN_ISLAND] * self.topology.size
+        for tile in self.small_islands_indices:
+            tile_islands[tile] = SMALL_ISLANDS
+        self.state.set_islands(tile_islands, 2)
 
     def _create_island(self):
         return super()._create_island()
 
+    @property
+    def main_island_position_dict(self):
+        positions = self.topology.positions
+        tiles = self.state.tiles()
+        return {positions[i]: tiles[i] for i in self.main_island_indices}
+
+    @property
+    def main_island_tiles_by_resource(self):
+        return self._tiles_by_resource(self.main_island_indices)
+
+    @property
+    def small_islands_position_dict(self):
+        positions = self.topology.positions
+        tiles = self.state.tiles()
+        return {positions[i]: tiles[i] for i in self.small_islands_indices}
 
-    def _check_adjacents(self, tile, num_adj, resource, checked=None):
-        return super()._check_adjacents(tile, num_adj, resource, checked)
+    @property
+    def small_islands_tiles_by_resource(self):
+        return self._tiles_by_resource(self.small_islands_indices)
 
-    def _reset_tile_resources(self, tiles, resource_dict):
+    @property
+    def points_per_island(self):
         """
-        Resets the tiles back to before resources were placed
+        How many points each resource gets on the main island and on the small islands,
+        as {'main': {resource: points}, 'small': {resource: points}}.
+        The totals are kept up to date by the board state as the numbers change, so this only reads them off.
         """
-        for tile in tiles:
-            if tile.resource != None:
-                if tile.resource not in resource_dict:
-                    resource_dict[tile.resource] = 1
-                else:
-                    resource_dict[tile.resource] += 1
-            tile.resource = None
-        return resource_dict
+        state = self.state
+        return {
+            name: {
+                RESOURCES[resource]: state.island_points[island][resource]
+                for resource in SCORED_RESOURCES if state.island_tiles[island][resource] > 0
+            }
+            for name, island in (('main', MAIN_ISLAND), ('small', SMALL_ISLANDS))
+        }
 
     def _place_resources(self, resources_dict, main_island_resources, adj_resource_limit=1, 
         main_island_center=False, main_island_dimension=(5, 3), main_island_desert_center=True, 
@@ -171,346 +244,226 @@ class SeafarerIslands(CatanIsland):
         main_island_dimensions takes in the maximum width and the minimum width of the main island
         to be generated on the board. main_island_center, if True, places the island in the center of the board.
         Otherwise, the island is generated in the top left corner (the start of the grid).
+
+        The small islands are grown on the tiles left around the main island (see _grow_islands)
+        and their resources are placed by the ResourceSolver, so this never starts over from scratch.
         """
         ADJ_RESOURCE_LIMIT = adj_resource_limit
+        topology = self.topology
+        tile_resources = self.state.resources
+        adjacents = topology.adjacents
+        dead_codes = [resource_code(resource) for resource in dead_tiles]
 
-        # Initially set the horizontal edges in the middle of the board to sea
-        # (Due to how the physical board is setup)
-        vert = floor(self.vertical / 2)
-        letter = self.letters[vert]
-        horz = '0'
-        for x in range(2):
-            if x == 1:
-                horz = self.horizontal - 1
-            pos = f"{letter}{horz}"
-            if pos in self.position_dict:
-                tile = self.position_dict[pos]
-                if tile.resource == None:
-                    tile.resource = 'Sea'
-                    if tile.resource in resources_dict:
-                        resources_dict[tile.resource] -= 1
-                        if resources_dict[tile.resource] == 0:
-                            resources_dict.pop(tile.resource)
-                            resources.remove(tile.resource)
-        
-        # Generate the main island
-        mini_catan = CatanIsland(main_island_dimension[0], main_island_dimension[1], main_island_resources, {}, main_island_desert_center, 1)
-        main_island = deque([tile for tile in mini_catan.position_dict.values()])
-
-        # Create resources list
-        resources = [resource for resource in resources_dict.keys() if resource not in dead_tiles]
-        # Create tile queue for big board
-        tiles = [tile for tile in self.position_dict.values() if tile.resource == None]
-        tiles_queue = deque(tiles)   
+        # Work with the resource codes from here on
+        remaining = {resource_code(resource): quantity for resource, quantity in resources_dict.items() if quantity > 0}
 
-        # Place the island in its proper place.
+        # Place the main island straight onto its tiles on the board,
+        # either in the center or in the top left corner
+        main_island_topology = get_topology(main_island_dimension[0], main_island_dimension[1])
         if main_island_center == True:
-            # TODO: Write code to place the island in the center of the board.
-            main_island_horz = main_island_dimension[0]
-            main_island_vert = mini_catan.vertical
-            big_board_horz = self.horizontal
-            big_board_vert = self.vertical
-
-            # Find the position of where the first tile of the main island will go on the board
-            vert_pos = floor(big_board_vert / 2) - floor(main_island_vert / 2)
-            letter = self.letters[vert_pos]
-            horz_pos = floor(big_board_horz / 2) - floor(main_island_horz / 2)
-            
-            pos = f"{letter}{horz_pos}"
-            while pos not in self.position_dict:
-                horz_pos -= 1
-                pos = f"{letter}{horz_pos}"    
-            main_island_horz = main_island_dimension[1]
-            i = 0
-            while len(main_island) > 0:
-                tile = self.position_dict[pos]
-                for x in range(main_island_horz):
-                    main_island_tile = main_island.popleft()
-                    # Assign resource
-                    tile.resource = main_island_tile.resource
-                    # Add tile to the main island position dictionary
-                    self.main_island_position_dict[tile.pos] = tile
-                    # Decrease the total resources
-                    resources_dict[tile.resource] -= 1
-                    if resources_dict[tile.resource] == 0:
-                        resources_dict.pop(tile.resource)
-
-                    # Add the tile to the tiles by resource dictionary
-                    if tile.resource != None:
-                        if tile.resource not in self.main_island_tiles_by_resource:
-                            self.main_island_tiles_by_resource[tile.resource] = [tile]
-                        else:
-                            if tile not in self.main_island_tiles_by_resource[tile.resource]:
-                                self.main_island_tiles_by_resource[tile.resource].append(tile)
-
-                    # Increment the tile position by two 
-                    # Since each horizontal tile is offset by two
-                    horz_pos += 2
-                    pos = f"{letter}{horz_pos}"
-                    tile = self.position_dict[pos]
-
-                # Bring the horizontal position back to the start of the island
-                # For the next row
-                horz_pos -= (main_island_horz * 2)
-                if i < mini_catan.diff:
-                    horz_pos -= 1
-                    main_island_horz += 1
-                else:
-                    horz_pos += 1
-                    main_island_horz -= 1
-                # Change the letter down to the next row
-                letter_pos = self.letter_to_number[letter]
-                letter = self.number_to_letter[letter_pos + 1]
-
-                # Define new tile
-                pos = f"{letter}{horz_pos}"
-                i += 1
-
+            offset = topology.center_offset(main_island_topology)
         else:
-            main_island_horz = main_island_dimension[1]
-            big_board_horz = self.min_width
-            i = 0
-            k = 0
-            while len(main_island) > 0:
-                for x in range(main_island_horz):
-                    main_island_tile = main_island.popleft()
-                    tile = tiles_queue.popleft()
-                    # Assign resource
-                    tile.resource = main_island_tile.resource
-                    # Add tile to the main island position dictionary
-                    self.main_island_position_dict[tile.pos] = tile
-
-                    # Add the tile to the tiles by resource dictionary
-                    if tile.resource != None:
-                        if tile.resource not in self.main_island_tiles_by_resource:
-                            self.main_island_tiles_by_resource[tile.resource] = [tile]
-                        else:
-                            if tile not in self.main_island_tiles_by_resource[tile.resource]:
-                                self.main_island_tiles_by_resource[tile.resource].append(tile)
-
-                    if tile.resource in resources_dict:
-                        resources_dict[tile.resource] -= 1
-                        if resources_dict[tile.resource] == 0:
-                            resources_dict.pop(tile.resource)
-                if i == mini_catan.diff:
-                    k += 1
-                else:
-                    k = 0
-                for y in range((big_board_horz + k) - main_island_horz):
-                    non_main_island_tile = tiles_queue.popleft()
-                    tiles_queue.append(non_main_island_tile)
-                
-                # Update how many tiles need to be assigned
-                if i < mini_catan.diff:
-                    main_island_horz += 1
-                else:
-                    main_island_horz -= 1
-                if i < self.diff:
-                    big_board_horz += 1
-                else:
-                    big_board_horz -= 1
-                i += 1
+            offset = topology.edge_offset(main_island_topology)
+        main_island_tiles = topology.embedding(main_island_topology, offset)
+        self.main_island_indices = list(main_island_tiles)
+        self._place_main_island_resources(main_island_topology, main_island_tiles, main_island_resources, main_island_desert_center)
+        for tile in main_island_tiles:
+            self._take_resource(remaining, tile_resources[tile])
+
+        # Set the horizontal edges in the middle of the board to sea
+        # (Due to how the physical board is setup)
+        for corner in ('left', 'right'):
+            tile = topology.corners[corner]
+            if tile_resources[tile] == EMPTY:
+                tile_resources[tile] = SEA
+                self._take_resource(remaining, SEA)
 
         # Place sea tiles all around the main island to make it an actual island
-        for tile in tiles_queue:
-            if tile.resource == None:
-                for adj in tile.possible_adjacents:
-                    if adj.resource not in dead_tiles:
-                        tile.resource = 'Sea'
-                        if tile.resource in resources_dict:
-                            resources_dict[tile.resource] -= 1
-                            if resources_dict[tile.resource] == 0:
-                                resources_dict.pop(tile.resource)
+        main_island_set = set(main_island_tiles)
+        for tile in range(topology.size):
+            if tile_resources[tile] == EMPTY and tile not in main_island_set:
+                for adj in adjacents[tile]:
+                    if tile_resources[adj] not in dead_codes:
+                        tile_resources[tile] = SEA
+                        self._take_resource(remaining, SEA)
                         break
-        
-        # Calculate the max island size
-        tiles = [tile for tile in tiles if tile.resource == None]
-        remaining_land_tiles = len(tiles) - resources_dict['Sea']
-        max_island_size = ceil(remaining_land_tiles / num_islands)
-
-        # Randomize the tiles
-        shuffle(tiles)
-        tiles_queue = deque(tiles)
-
-        # Create a number of island
-        island_count = 0
-        while remaining_land_tiles > 0:
-
-            # Randomize the tiles before creating each new island
-            tiles = [tile for tile in tiles if tile.resource == None]
-            if 'Sea' in resources_dict:
-                remaining_land_tiles = len(tiles) - resources_dict['Sea']
-            else:
-                remaining_land_tiles = len(tiles)
-            if remaining_land_tiles < max_island_size:
-                max_island_size = remaining_land_tiles
-
-            # Randomize the tiles
-            shuffle(tiles)
-            tiles_queue = deque(tiles)
-
-            # There is no need to check for adjacent islands
-            # because the existing islands are surrounded by sea
-            # Any islands that are not surrounded by sea,
-            # would signal that there are no more sea tiles,
-            # and should be added to anyways
-            tile = tiles_queue.popleft()
-            # Create island:
-            island_finished = False
-            island = []
-            while len(island) < max_island_size and island_finished == False:
-
-                # Add the tile to the island
-                island.append(tile)
-                adj_count = 0
-                count = 0
-                while tile.resource == None and len(resources) > 0:
-
-                    # Prevents from getting stuck in an infinite loop when there is only one
-                    # tile left and there is an adjacent tile with the same resource.
-                    if count > 250:
-                        main_island_tiles = []
-                        for tile_list in self.main_island_tiles_by_resource.values():
-                            for tile in tile_list:
-                                main_island_tiles.append(tile)
-                        # Set the resource dictionary to an empty dictionary to avoid adding double resources
-                        # Clear all the resources currently allocated and attempt to reallocate the resources
-                        # First define the main island resource dict to pass into the base game Catan class
-                        main_island_resources = self._reset_tile_resources(main_island_tiles, {})
-                        # Setting the resources dict equal to the main island resources dict will ensure that all
-                        # resources are accounted for
-                        resources_dict = self._reset_tile_resources(self.position_dict.values(), resources_dict)
-                        # Add the main_island_resources to the overall resources dict
-                        for resource, quantity in main_island_resources.items():
-                            if resource in resources_dict:
-                                resources_dict[resource] += quantity
-                        # Rerun the method
-                        self._place_resources(
-                            resources_dict, main_island_resources, ADJ_RESOURCE_LIMIT, 
-                            main_island_center, main_island_dimension, main_island_desert_center, 
-                            num_islands, dead_tiles
-                        )
-                    # TODO: See if I need to add another check here
-                    # Randomly select a resource from the list
-                    resource_indx = randint(0, len(resources) - 1)
-                    resource = resources[resource_indx]
-
-                    # Find our how many of that resource is already adjacent
-                    num_adj = 0
-                    checked = []
-                    for adj in tile.possible_adjacents:
-                        if adj.resource == resource:
-                            if adj not in checked:
-                                num_adj += 1
-                                checked.append(adj)
-                                # Check that adj tiles to see if it also has 
-                                # An adjacent resource of the same type
-                                num_adj = self._check_adjacents(adj, num_adj, resource, checked)
-                            
-                    # If the check is met then decrease the number of that resource by one
-                    if num_adj < ADJ_RESOURCE_LIMIT:
-                        if resource in resources_dict:
-                            tile.resource = resource
-                        
-                            resources_dict[resource] -= 1
-                            if resources_dict[resource] == 0:
-                                resources_dict.pop(resource)
-                                resources.pop(resource_indx)
-
-                    elif adj_count > 5:
-                        for tile in island:
-                            # This prevents sea tiles from being moved around
-                            if tile.resource not in dead_tiles:
-                                if tile.resource not in resources_dict:
-                                    resources_dict[tile.resource] = 1
-                                    resources.append(tile.resource)
-                                else:
-                                    resources_dict[tile.resource] += 1
-                                tile.resource = None
-                                tiles_queue.append(tile)
-                        # Reset the island back to an empty list
-                        island = []
-                        # Check to see if there are any remaining land tiles
-                        # Before popping a tile from the queue
-                        if remaining_land_tiles > 0:
-                            tiles = [tile for tile in tiles if tile.resource == None]
-                            tiles_queue = deque(tiles)
-                            if len(tiles_queue) > 0:
-                                tile = tiles_queue.popleft()
-                        else:
-                            island_finished = True
-                        adj_count = 0
-
-                    else:
-                        adj_count += 1
-                    
-                    # Randomize the tiles before creating each new island
-                    tiles = [tile for tile in tiles if tile.resource == None]
-                    if 'Sea' in resources_dict:
-                        remaining_land_tiles = len(tiles) - resources_dict['Sea']
-                    else:
-                        remaining_land_tiles = len(tiles) 
-                
-                    count += 1
-
-                possible_adjs = []
-                # Pick an adjacent tile that doesn't yet have a resource
-                for adj in tile.possible_adjacents:
-                    if adj.resource == None:
-                        possible_adjs.append(adj)
-
-                # Pick a random adjacent tile to continue the island
-                possible_adjs = [adj for adj in possible_adjs if adj.resource==None and adj not in island]
-                if len(possible_adjs) > 0:
-                    random_indx = randint(0, len(possible_adjs) - 1)
-                    tile = possible_adjs[random_indx]
-                else:
-                    island_finished = True
-
-            # Place sea tile all around the island 
-            # to make it an island
-            for tile in island:
-                for adj in tile.possible_adjacents:
-                    if adj.resource == None:
-                        adj.resource = 'Sea'
-                        if adj.resource in resources_dict:
-                            resources_dict[adj.resource] -= 1
-                            if resources_dict[adj.resource] == 0:
-                                resources_dict.pop(adj.resource)
-
-            island_count += 1
-            # Randomize the tiles before creating each new island
-            tiles = [tile for tile in tiles if tile.resource == None]
-            if 'Sea' in resources_dict:
-                remaining_land_tiles = len(tiles) - resources_dict['Sea']
-            else:
-                remaining_land_tiles = len(tiles)
-
-
-        while len(tiles_queue) > 0:
-
-            tile = tiles_queue.popleft()
-
-            if tile.resource == None:
-                if 'Sea' in resources_dict:
-                    tile.resource = 'Sea'
-
-                    # Decrease the resource amount by one
-                    # And remove the resource as an option if it's been all used up.
-                    resources_dict['Sea'] -= 1
-                    if resources_dict['Sea'] == 0:
-                        resources_dict.pop('Sea')
-
-        for tile in self.position_dict.values():
-            if tile.pos not in self.main_island_position_dict:
-                if tile.resource not in dead_tiles:
-                    self.small_islands_position_dict[tile.pos] = tile
-                    # Add the tile to the tiles by resource dictionary
-                    if tile.resource not in self.small_islands_tiles_by_resource:
-                        self.small_islands_tiles_by_resource[tile.resource] = [tile]
-                    else:
-                        if tile not in self.small_islands_tiles_by_resource[tile.resource]:
-                            self.small_islands_tiles_by_resource[tile.resource].append(tile)
+
+        # Grow the small islands on the tiles that are left, then place their resources
+        tiles = [tile for tile in range(topology.size) if tile_resources[tile] == EMPTY and tile not in main_island_set]
+        land = {resource: quantity for resource, quantity in remaining.items() if resource not in dead_codes}
+        land_tiles = min(len(tiles) - remaining.get(SEA, 0), sum(land.values()))
+        islands = self._grow_islands(tiles, land_tiles, num_islands)
+        island_tiles = [tile for island in islands for tile in island]
+
+        solver = ResourceSolver(topology, tile_resources, ADJ_RESOURCE_LIMIT, self.rng)
+        try:
+            solver.solve(island_tiles, land)
+        finally:
+            if self.stats is not None:
+                self.stats.count('small_islands', len(islands))
+                self.stats.count('resource_backtracks', solver.total_backtracks)
+                self.stats.count('resource_restarts', solver.restarts)
+        for tile in island_tiles:
+            self._take_resource(remaining, tile_resources[tile])
+
+        # Fill in the rest of the board with sea
+        for tile in range(topology.size):
+            if tile_resources[tile] == EMPTY and SEA in remaining:
+                tile_resources[tile] = SEA
+                self._take_resource(remaining, SEA)
+
+        self._set_small_islands()
+
+    def _place_main_island_resources(self, main_island_topology, main_island_tiles, main_island_resources, desert_center=True):
+        """
+        Places the main island's resources on its tiles (main_island_tiles gives the tile on the board
+        for every tile of the main island) the same way they are placed on a CatanIsland,
+        only with no more than one resource of the same kind next to one another.
+        """
+        tile_resources = self.state.resources
+        resources_dict = {resource_code(resource): quantity for resource, quantity in main_island_resources.items() if quantity > 0}
+
+        if desert_center == True:
+            for tile in main_island_topology.center_order:
+                if DESERT not in resources_dict:
+                    break
+                tile = main_island_tiles[tile]
+                if tile_resources[tile] == EMPTY:
+                    tile_resources[tile] = DESERT
+                    self._take_resource(resources_dict, DESERT)
+
+        tiles = [tile for tile in main_island_tiles if tile_resources[tile] == EMPTY]
+        solver = ResourceSolver(self.topology, tile_resources, 1, self.rng)
+        try:
+            solver.solve(tiles, resources_dict)
+        finally:
+            if self.stats is not None:
+                self.stats.count('main_island_resource_backtracks', solver.total_backtracks)
+                self.stats.count('main_island_resource_restarts', solver.restarts)
+
+    def _grow_islands(self, tiles, land_tiles, num_islands):
+        """
+        Splits land_tiles of the given (empty) tiles into num_islands islands of about the same size
+        that don't touch each other, so there is sea all the way around every island.
+
+        The islands are grown one after the other (see _try_grow_islands), and if they can't all be grown
+        they are started over, up to island_attempts times or until the time budget is used up.
+        After that a BoardGenerationError is raised, so the growth always finishes within the budget.
+        """
+        if land_tiles <= 0:
+            return []
+        num_islands = max(1, min(num_islands, land_tiles))
+        sizes = [land_tiles // num_islands + (1 if i < land_tiles % num_islands else 0) for i in range(num_islands)]
+
+        islands = None
+        attempts = 0
+        while islands is None and attempts < self.island_attempts and not self._out_of_time():
+            attempts += 1
+            islands = self._try_grow_islands(tiles, sizes)
+        if self.stats is not None:
+            self.stats.count('island_restarts', attempts - (islands is not None))
+        if islands is None:
+            raise BoardGenerationError(
+                f"Could not grow {num_islands} separate islands out of {land_tiles} tiles "
+                f"in {attempts} attempts"
+            )
+
+        return islands
+
+    def _try_grow_islands(self, tiles, sizes):
+        """
+        Grows an island of each size out of the tiles, with sea between all of them (see _grow_islands_from).
+        Returns None if the islands couldn't all be grown within ISLAND_STEPS islands.
+        """
+        return self._grow_islands_from(set(tiles), sizes, iter(range(ISLAND_STEPS)))
+
+    def _grow_islands_from(self, free, sizes, steps):
+        """
+        Grows the islands of the given sizes out of the free tiles, taking a step for every island grown.
+        Each island is tried from a few tiles in the corners of the free tiles (see _grow_island),
+        and when the islands after it can no longer fit it is grown again from the next one,
+        going back to the islands before it once it has been tried from all of them.
+        Returns the islands, or None if they couldn't be grown before the steps ran out.
+        """
+        if len(sizes) == 0:
+            return []
+        adjacents = self.topology.adjacents
+        rng = self.rng
+        # An island in a corner takes up less of the free tiles with the sea around it
+        starts = sorted(free, key=lambda tile: sum(adj in free for adj in adjacents[tile]) + ISLAND_JITTER * rng.random())
+        for start in starts[:ISLAND_STARTS]:
+            if next(steps, None) is None:
+                return None
+            grown = self._grow_island(start, sizes[0], free)
+            if grown is not None:
+                island, taken = grown
+                left = free - taken
+                if self._islands_fit(left, sizes[1:]):
+                    islands = self._grow_islands_from(left, sizes[1:], steps)
+                    if islands is not None:
+                        return [island] + islands
+            if self.stats is not None:
+                self.stats.count('island_resets')
+
+        return None
+
+    def _grow_island(self, start, size, free):
+        """
+        Grows an island of size tiles out of the free tiles from start, adding the tile on its edge
+        that takes up the fewest more free tiles for the sea around it (and touches the most of the island),
+        with a bit of chance thrown in (see ISLAND_JITTER).
+        Returns the island and the free tiles it takes up with the sea around it, or None if it got boxed in.
+        """
+        adjacents = self.topology.adjacents
+        rng = self.rng
+        island = [start]
+        members = {start}
+        taken = {start}
+        taken.update(adj for adj in adjacents[start] if adj in free)
+        while len(island) < size:
+            best = None
+            best_key = None
+            for tile in taken - members:
+                more = sum(1 for adj in adjacents[tile] if adj in free and adj not in taken)
+                touching = sum(1 for adj in adjacents[tile] if adj in members)
+                key = more - touching + ISLAND_JITTER * rng.random()
+                if best_key is None or key < best_key:
+                    best, best_key = tile, key
+            if best is None:
+                return None
+            island.append(best)
+            members.add(best)
+            taken.update(adj for adj in adjacents[best] if adj in free)
+
+        return island, taken
+
+    def _islands_fit(self, free, sizes):
+        """
+        A quick check that islands of the given sizes could still fit on the free tiles:
+        the groups of free tiles big enough for the smallest island have room for all of them,
+        and the biggest island fits in the biggest group.
+        """
+        if len(sizes) == 0:
+            return True
+        adjacents = self.topology.adjacents
+        groups = []
+        seen = set()
+        for tile in free:
+            if tile in seen:
+                continue
+            seen.add(tile)
+            stack = [tile]
+            group = 1
+            while stack:
+                for adj in adjacents[stack.pop()]:
+                    if adj in free and adj not in seen:
+                        seen.add(adj)
+                        stack.append(adj)
+                        group += 1
+            groups.append(group)
+        smallest = min(sizes)
+
+        return sum(group for group in groups if group >= smallest) >= sum(sizes) and max(groups, default=0) >= max(sizes)
 
     def _check_adjacent_tiles(self, tile, number, resources):
         """
@@ -518,21 +471,24 @@ class SeafarerIslands(CatanIsland):
         to check if any of the surrounding numbers are the same. 
         Or if 5 or 1 point tiles are adjacent to one another
         """
-        points = self.num_to_points[number]
+        tile_resources = self.state.resources
+        numbers = self.state.numbers
+        tile_points = self.state.points
+        points = NUMBER_POINTS[number]
 
-        for adj in tile.possible_adjacents:
+        for adj in self.topology.adjacents[tile]:
             # If any of the adjacent numbers have the same number, 
             # return False
-            if adj.number == number:
+            if numbers[adj] == number:
                 return False
 
             if points == 5 or points == 1:
-                if adj.points == points:
+                if tile_points[adj] == points:
                     return False
                     
         # To prevent one island tiles from getting 1 point numbers            
         if points == 1:
-            adj_tile_resources = [adj.resource for adj in tile.possible_adjacents]
+            adj_tile_resources = [tile_resources[adj] for adj in self.topology.adjacents[tile]]
             for resource in resources:
                 if resource in adj_tile_resources:
                     return True
@@ -542,35 +498,33 @@ class SeafarerIslands(CatanIsland):
         # Or on the edges of the main island.
         if points < 2:
             sea_count = 0
-            for adj in tile.possible_adjacents:
-                if adj.resource == 'Sea':
+            for adj in self.topology.adjacents[tile]:
+                if tile_resources[adj] == SEA:
                     sea_count += 1
             if sea_count >= 3:
                 return False
 
         return True
 
-    def _check_three_tile_sum(self, points, adj_1, adj_2):
+    def _check_three_tile_sum(self, vertex, tile, adj_1, adj_2):
         """
-        Checks the adjacent tiles around the proposed tile
+        Checks the three tiles around an intersection (vertex) of the proposed tile
         and sums the points for all three tiles.
         If the sum is greater than a certain threshold; 12,
         or less than 4, return False
         Otherwise return True
         """
-        if adj_1.number == None or adj_2.number == None:
+        numbers = self.state.numbers
+        tile_points = self.state.points
+        points = tile_points[tile]
+        if numbers[adj_1] == NO_NUMBER or numbers[adj_2] == NO_NUMBER:
             if points >= 2:
                 return True
-            elif adj_1.points > 2 or adj_2.points > 2:
+            elif tile_points[adj_1] > 2 or tile_points[adj_2] > 2:
                 return True
-            elif adj_1.number == None and adj_2.number == None:
+            elif numbers[adj_1] == NO_NUMBER and numbers[adj_2] == NO_NUMBER:
                 return True
-        three_tile_sum = 0
-        three_tile_sum += points
-        # Check if the adj tile is None, 
-        # Otherwise it will throw an error
-        three_tile_sum += adj_1.points
-        three_tile_sum += adj_2.points
+        three_tile_sum = self.state.vertex_points[vertex]
         
         # Check if three tile sum is greater than 12 or
         # less than 4
@@ -578,217 +532,34 @@ class SeafarerIslands(CatanIsland):
             return False
         return True
 
-    
     def _place_numbers_by_resource_main_island(self, numbers_dict, dead_tiles=['Desert', 'Sea', None]):
         """
         Places numbers by resource on all the tiles on the main island.
         """
-        # Create a list and then a queue of resources to go through until all the resources
-        # Have number tokens on them.
-        main_island_tiles = [tile for tile in self.main_island_position_dict.values() if tile.resource not in dead_tiles]
-        resources = [resource for resource in self.main_island_tiles_by_resource.keys() if resource not in dead_tiles]
-        shuffle(resources)
-        resources_queue = deque(resources)
-        numbers = [n for n in numbers_dict.keys()]
-        for x in range(10):
-            n_shuff = randint(0, len(numbers) - 1)
-            numbers = numbers[n_shuff:] + numbers[:n_shuff]
-        numbers_queue = deque(numbers)
-        # numbers_queue = deque(self.main_island_number_placement_order)
-        
-        count = 0
-        meta_count = 0
-        while len(numbers_queue) != 0 and meta_count < 250:
-
-            count += 1  
-            # Once the count reaches a certian threshold,
-            # remove all the number and points from the tiles
-            if count >= 250:
-                numbers_dict, numbers_queue = self._reset_tile_numbers(main_island_tiles, numbers_dict, numbers_queue)
-                # Shuffle the resources_queue and numbers_queue so as not to run into the same placing order problem
-                numbers = [n for n in numbers_dict.keys()]
-                for x in range(10):
-                    r_shuff = randint(0, len(resources) - 1)
-                    n_shuff = randint(0, len(numbers) - 1)
-                    resources = resources[r_shuff:] + resources[:r_shuff]
-                    numbers = numbers[n_shuff:] + numbers[:n_shuff]
-                resources_queue = deque(resources)
-                numbers_queue = deque(numbers)
-                count = 0
-                meta_count += 1
-                
-            # Go through the resources and keep the number until that number is used up
-            number = numbers_queue.popleft()
-            points = self.num_to_points[number]
-            resource = resources_queue.popleft()
-
-            tiles = [tile for tile in reversed(self.main_island_tiles_by_resource[resource]) if tile.resource == resource]
-            
-            shuffle(tiles)
-            for tile in tiles:
-    
-                if tile.number == None:
-                    check_adjacents = self._check_adjacent_tiles(tile, number, resources)
-                    if check_adjacents == True:
-                        tile.number = number
-                        tile.points = points
-
-                        numbers_dict[number] -= 1
-                        if numbers_dict[number] == 0:
-                            numbers_dict.pop(number)
-                        else:
-                            numbers_queue.appendleft(number)   
-                        break
+        dead_codes = [resource_code(resource) for resource in dead_tiles]
+        main_island_tiles = [tile for tile in self.main_island_indices if self.state.resources[tile] not in dead_codes]
+        resources = list(self._indices_by_resource(main_island_tiles).keys())
 
-            if number in numbers_dict and number not in numbers_queue:
-                numbers_queue.appendleft(number) 
-            resources_queue.append(resource)
+        def check_tile(tile, number):
+            return self._check_adjacent_tiles(tile, number, resources)
 
-        # Checks all the tiles to make sure all the tiles meet the three tile sum check
-        # If even one tile fails the board is re-generated.
-        for tile in main_island_tiles:
-
-            prev = None
-            for adj in tile.possible_adjacents:
-                # Checks three tiles at a time
-                # so this skips the first iteration
-                # which would only check two tiles
-                if prev != None:
-                    three_tile_sum_check = self._check_three_tile_sum(tile.points, adj, prev)
-                    if three_tile_sum_check == False:
-                        break
-                prev = adj
-            # If one of the tile checks is False 
-            # start over from scratch
-            if three_tile_sum_check == False:
-                numbers_dict, numbers_queue = self._reset_tile_numbers(main_island_tiles, numbers_dict, numbers_queue)
-                self._place_numbers_by_resource_main_island(numbers_dict)
+        self._place_numbers(main_island_tiles, numbers_dict, list(numbers_dict.keys()), check_tile, 250, shuffle_order=True)
 
 
     def _place_numbers_by_resource_smaller_islands(self, numbers_dict, dead_tiles=['Desert', 'Sea', None]):
         """
         Places numbers on the outlying smaller islands.
+        The number of island tiles can vary depending on the small islands generation,
+        so the placement is finished once either all the numbers or all the tiles are used up.
         """
-        # Create a list and then a queue of resources to go through until all the resources
-        # Have number tokens on them.
-        small_islands_tiles = [tile for tile in self.small_islands_position_dict.values() if tile.resource not in dead_tiles]
-        resources = [resource for resource in self.small_islands_tiles_by_resource.keys() if resource not in dead_tiles]
-        resources_queue = deque(resources)
-        numbers_queue = deque(self.small_islands_number_placement_order)
-        
-        count = 0
-        all_have_numbers = False
-        while len(numbers_queue) != 0 and all_have_numbers == False:
-
-            count += 1  
-            # Once the count reaches a certian threshold,
-            # remove all the number and points from the tiles
-            if count >= 500:
-                # Check to see if all the tiles have numbers
-                # This is because the number of island tiles can 
-                # vary depending on the small islands generation
-                no_numbers = []
-                for tile in self.small_islands_position_dict.values():
-                    if tile.number == None:
-                        no_numbers.append(tile)
-                if len(no_numbers) == 0:
-                    all_have_numbers = True
-                else:
-                    numbers_dict, numbers_queue = self._reset_tile_numbers(small_islands_tiles, numbers_dict, numbers_queue)
-                    count = 0
-                
-            # Go through the resources and keep the number until that number is used up
-            number = numbers_queue.popleft()
-            points = self.num_to_points[number]
-            resource = resources_queue.popleft()
-
-            tiles = [tile for tile in reversed(self.small_islands_tiles_by_resource[resource]) if tile.resource == resource]
-            
-            shuffle(tiles)
-            for tile in tiles:
-    
-                if tile.number == None:
-                    check_adjacents = self._check_adjacent_tiles(tile, number, resources)
-                    if check_adjacents == True:
-                        tile.number = number
-                        tile.points = points
-
-                        numbers_dict[number] -= 1
-                        if numbers_dict[number] == 0:
-                            numbers_dict.pop(number)
-                        else:
-                            numbers_queue.appendleft(number)   
-                        break
-
-            if number in numbers_dict and number not in numbers_queue:
-                numbers_queue.appendleft(number) 
-            resources_queue.append(resource)
-
-        # Checks all the tiles to make sure all the tiles meet the three tile sum check
-        # If even one tile fails the board is re-generated.
-        for tile in small_islands_tiles:
-
-            prev = None
-            for adj in tile.possible_adjacents:
-                # Checks three tiles at a time
-                # so this skips the first iteration
-                # which would only check two tiles
-                if prev != None:
-                    three_tile_sum_check = self._check_three_tile_sum(tile.points, adj, prev)
-                    if three_tile_sum_check == False:
-                        break
-                prev = adj
-            # If one of the tile checks is False 
-            # start over from scratch
-            if three_tile_sum_check == False:
-                numbers_dict, numbers_queue = self._reset_tile_numbers(small_islands_tiles, numbers_dict, numbers_queue)
-                self._place_numbers_by_resource_smaller_islands(numbers_dict)
-
-
-    def print_resources(self):
-        """
-        Prints where the resources are on the islands.
-        """
-
-        island = self.island
+        dead_codes = [resource_code(resource) for resource in dead_tiles]
+        small_islands_tiles = [tile for tile in self.small_islands_indices if self.state.resources[tile] not in dead_codes]
+        resources = list(self._indices_by_resource(small_islands_tiles).keys())
 
-        horizontal_line_segment = '____'
-        horizontal_line = horizontal_line_segment * self.horizontal
-        print()
-
-        for y in range(len(island)):
-            for x in range(len(island[0])):
-                tile = island[y][x]
-                if tile.resource != None:
-                    print(f'| {tile.resource[:2]} |', end='')
-                else:
-                    print(f'  ', end='')
-            
-            print(f'\n{horizontal_line}')
-
-    def print_numbers(self):
-        """
-        Prints where the numbers are on the island.
-        """
+        def check_tile(tile, number):
+            return self._check_adjacent_tiles(tile, number, resources)
 
-        island = self.island
-
-        horizontal_line_segment = '____'
-        horizontal_line = horizontal_line_segment * self.horizontal
-        print()
-        for resource, point_list in self.resource_points.items():
-            print(f"{resource}: {sum(point_list)}", end=' ')
-        print()
-
-        for y in range(len(island)):
-            for x in range(len(island[0])):
-                tile = island[y][x]
-                if tile.number != None:
-                    print(f'| {tile.number} |', end='')
-                else:
-                    print(f'    ', end='')
-            
-            print(f'\n{horizontal_line}')
+        self._place_numbers(small_islands_tiles, numbers_dict, self.small_islands_number_placement_order, check_tile, 500)
 
 
 def example():
@@ -0,0 +1,79 @@
+# python3
+# vertex_graph.py - The intersections (vertices) and roads (edges) between the tiles of an island.
+
+from hex_topology import DIRECTION_OFFSETS
+
+
+class VertexGraph:
+    """
+    The corners of the tiles of an island, where settlements go, and the sides between them, where roads go.
+    Vertices and edges are referred to by index, like the tiles are.
+
+    Corner k of a tile sits between its neighbors in directions k and k + 1 (see hex_topology.DIRECTIONS),
+    so going round the corners follows the directions: right, top_right, top_left, left, bottom_left, bottom_right.
+    Side k of a tile faces its neighbor in direction k and runs from corner k - 1 to corner k.
+
+        vertex_tiles:     the tiles (1 to 3) touching each vertex
+        tile_vertices:    the six vertices around each tile, in corner order
+        intersections:    the vertices touching three tiles
+        edges:            the two vertices at the ends of each edge
+        tile_edges:       the six edges around each tile, in side order
+        vertex_edges:     the edges (2 or 3) ending at each vertex
+        vertex_neighbors: the vertices one edge away from each vertex
+
+    Like the topology it is built from, nothing in here changes once it is built.
+    """
+
+    def __init__(self, topology):
+        # Every corner is named by the (x, y) positions of the three tiles around it,
+        # including the ones off the island, so the tiles that share a corner agree on its name
+        vertex_of = {}
+        vertex_tiles = []
+        tile_vertices = []
+        for x, y in topology.coords:
+            around = [(x + dx, y + dy) for dx, dy in DIRECTION_OFFSETS]
+            corners = []
+            for k in range(6):
+                key = frozenset(((x, y), around[k], around[(k + 1) % 6]))
+                vertex = vertex_of.get(key)
+                if vertex is None:
+                    vertex = len(vertex_tiles)
+                    vertex_of[key] = vertex
+                    vertex_tiles.append(tuple(sorted(
+                        topology.index_of[coord] for coord in key if coord in topology.index_of
+                    )))
+                corners.append(vertex)
+            tile_vertices.append(tuple(corners))
+
+        edge_of = {}
+        edges = []
+        tile_edges = []
+        for corners in tile_vertices:
+            sides = []
+            for k in range(6):
+                key = frozenset((corners[k - 1], corners[k]))
+                edge = edge_of.get(key)
+                if edge is None:
+                    edge = len(edges)
+                    edge_of[key] = edge
+                    edges.append((corners[k - 1], corners[k]))
+                sides.append(edge)
+            tile_edges.append(tuple(sides))
+
+        vertex_edges = [[] for vertex in vertex_tiles]
+        vertex_neighbors = [[] for vertex in vertex_tiles]
+        for edge, (a, b) in enumerate(edges):
+            vertex_edges[a].append(edge)
+            vertex_edges[b].append(edge)
+            vertex_neighbors[a].append(b)
+            vertex_neighbors[b].append(a)
+
+        self.size = len(vertex_tiles)
+        self.vertex_tiles = tuple(vertex_tiles)
+        self.tile_vertices = tuple(tile_vertices)
+        self.intersections = tuple(vertex for vertex, tiles in enumerate(vertex_tiles) if len(tiles) == 3)
+        self.edges = tuple(edges)
+        self.tile_edges = tuple(tile_edges)
+        self.vertex_edges = tuple(tuple(edges) for edges in vertex_edges)
+        self.vertex_neighbors = tuple(tuple(neighbors) for neighbors in vertex_neighbors)
+